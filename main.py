@@ -66,6 +66,13 @@ class SistemaAnaliseFundamentalista:
             help='Exportar dados completos para Excel'
         )
 
+        analisador_argumentos.add_argument(
+            '--sem-janelas',
+            action='store_true',
+            default=os.environ.get('BUSCADOR_HEADLESS') == '1',
+            help='Apenas salvar os gráficos, sem abrir janelas (backend Agg; também via BUSCADOR_HEADLESS=1)'
+        )
+
         return analisador_argumentos.parse_args()
 
     def _carregar_lista_exclusoes(self, caminho_arquivo='config/lista_exclusoes.txt'):
@@ -126,15 +133,14 @@ class SistemaAnaliseFundamentalista:
         total_ativos = len(dataframe_analise)
         ativos_processados = 0
 
-        for indice, linha in dataframe_analise.iterrows():
-            try:
-                ticker = linha.get('ticker')
-                preco_atual = linha.get('Cotacao')
-                lucro_por_acao = linha.get('LPA')
-                valor_patrimonial_por_acao = linha.get('VPA')
-                payout_medio = linha.get('Payout_Medio')
-                pl_medio_setor = linha.get('PL_Medio_Subsetor')
+        # Apenas as colunas de entrada, percorridas como tuplas (colunas ausentes viram NaN)
+        colunas_entrada = ['ticker', 'Cotacao', 'LPA', 'VPA', 'Payout_Medio', 'PL_Medio_Subsetor']
+        dados_entrada = dataframe_analise.reindex(columns=colunas_entrada)
+
+        for linha in dados_entrada.itertuples(name=None):
+            indice, ticker, preco_atual, lucro_por_acao, valor_patrimonial_por_acao, payout_medio, pl_medio_setor = linha
 
+            try:
                 # Converter para numérico
                 preco_atual_numerico = pd.to_numeric(preco_atual, errors='coerce')
                 lpa_numerico = pd.to_numeric(lucro_por_acao, errors='coerce')
@@ -163,7 +169,7 @@ class SistemaAnaliseFundamentalista:
                     print(f"   📊 Processados {ativos_processados}/{total_ativos} ativos...")
 
             except Exception as erro:
-                print(f"   ⚠️ Erro ao processar {linha.get('ticker', 'Desconhecido')}: {erro}")
+                print(f"   ⚠️ Erro ao processar {ticker}: {erro}")
                 continue
 
         # Garantir tipos numéricos nas colunas de margem
@@ -296,7 +302,7 @@ class SistemaAnaliseFundamentalista:
         print(f"   • Desvio padrão: {score_wsm.std():.2f}")
 
     def _gerar_visualizacoes_completas(self, dataframe_visualizacao, quantidade_rankings,
-                                       modo_apenas_visualizacoes=False):
+                                       modo_apenas_visualizacoes=False, sem_janelas=False):
         """
         Gera todas as visualizações e relatórios da análise
 
@@ -304,9 +310,10 @@ class SistemaAnaliseFundamentalista:
             dataframe_visualizacao (pd.DataFrame): DataFrame preparado para visualização
             quantidade_rankings (int): Número de empresas nos rankings visuais
             modo_apenas_visualizacoes (bool): Modo apenas geração de visualizações
+            sem_janelas (bool): Figuras não serão exibidas (fecha após salvar)
 
         Returns:
-            list: Lista de figuras geradas
+            list: Lista de figuras geradas (caminhos dos arquivos salvos quando sem_janelas=True)
         """
         print("\n🎨 Gerando visualizações e relatórios...")
 
@@ -319,14 +326,16 @@ class SistemaAnaliseFundamentalista:
             figuras_wsm = gerador_wsm.gerar_relatorio_completo(
                 top_empresas=quantidade_rankings,
                 caminho_salvamento=f"output/graficos/wsm_truncado_completo_{timestamp_analise}",
-                penalidade=False
+                penalidade=False,
+                liberar_figuras=sem_janelas
             )
             figuras_geradas.extend(figuras_wsm)
 
             figuras_wsm_penalidade = gerador_wsm.gerar_relatorio_completo(
                 top_empresas=quantidade_rankings,
                 caminho_salvamento=f"output/graficos/wsm_penalizado_completo_{timestamp_analise}",
-                penalidade=True
+                penalidade=True,
+                liberar_figuras=sem_janelas
             )
             figuras_geradas.extend(figuras_wsm_penalidade)
 
@@ -452,6 +461,11 @@ class SistemaAnaliseFundamentalista:
         print(f"   • Apenas visualizações: {'SIM' if argumentos.apenas_visualizacoes else 'NÃO'}")
         print(f"   • Empresas no ranking: {quantidade_rankings}")
         print(f"   • Exportar dados: {'SIM' if argumentos.exportar_dados else 'NÃO'}")
+        print(f"   • Sem janelas: {'SIM' if argumentos.sem_janelas else 'NÃO'}")
+
+        # Execução sem interface: o backend Agg renderiza direto para os PNGs, sem toolkit gráfico
+        if argumentos.sem_janelas:
+            plt.switch_backend('agg')
 
         # Carregar dados fundamentais
         print("\n📥 Carregando dados fundamentais...")
@@ -498,7 +512,7 @@ class SistemaAnaliseFundamentalista:
 
         # Gerar visualizações
         figuras = self._gerar_visualizacoes_completas(
-            dados_visualizacao, quantidade_rankings, argumentos.apenas_visualizacoes
+            dados_visualizacao, quantidade_rankings, argumentos.apenas_visualizacoes, argumentos.sem_janelas
         )
 
         # Exportar dados se solicitado
@@ -510,12 +524,15 @@ class SistemaAnaliseFundamentalista:
         print("\n" + "=" * 70)
         print("✅ ANÁLISE CONCLUÍDA COM SUCESSO!")
         print("=" * 70)
-        print("📈 Para visualizar os gráficos, feche as janelas do matplotlib")
+        if not argumentos.sem_janelas:
+            print("📈 Para visualizar os gráficos, feche as janelas do matplotlib")
         print("💾 Relatórios salvos em: output/dados/analises/")
         print("🖼️  Visualizações salvas em: output/graficos/")
 
         # Exibir gráficos
-        if figuras:
+        if argumentos.sem_janelas:
+            print(f"🖼️  {len(figuras)} visualizações WSM salvas (sem janelas)")
+        elif figuras:
             plt.show()
         else:
             print("⚠️ Nenhuma visualização gerada para exibição")
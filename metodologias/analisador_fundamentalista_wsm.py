@@ -3,6 +3,56 @@ import numpy as np
 from scipy import stats
 
 
+def _score_kernel(V, M, pesos, sinais, adv_mask, soma_pesos_total):
+    """
+    Calcula os scores WSM (truncado e com penalidade) de todas as empresas
+    em uma única passada sobre a matriz de indicadores
+
+    Args:
+        V (np.ndarray): Valores dos indicadores (empresas x indicadores)
+        M (np.ndarray): Médias ponderadas do subsetor alinhadas a V
+        pesos (np.ndarray): Peso de cada indicador
+        sinais (np.ndarray): 1 para 'maior_melhor', -1 para 'menor_melhor'
+        adv_mask (np.ndarray): Marca os indicadores avançados (margens de segurança)
+        soma_pesos_total (float): Soma dos pesos de todos os indicadores do modelo
+
+    Returns:
+        tuple: (scores, scores_penalidade, completude) como np.ndarray
+    """
+    # Máscara única de valores disponíveis para toda a matriz
+    validos = ~np.isnan(V)
+
+    # Margem relativa à média do subsetor para toda a matriz de uma vez:
+    # o inverso de |M| é zero onde não há média, o que zera a margem sem ramificações
+    medias = np.where(np.isnan(M), 0.0, M)
+    inverso_medias = np.zeros_like(medias)
+    np.reciprocal(np.abs(medias), out=inverso_medias, where=medias != 0)
+    margens = (V - medias) * inverso_medias * 100.0
+
+    # Margens de segurança: positiva limitada em 100% e penalidade máxima de -50%
+    margens[:, adv_mask] = np.clip(V[:, adv_mask], -50.0, 100.0)
+
+    # Mesma margem alimenta os dois scores: com penalidade e truncado em zero.
+    # Indicadores ausentes não pontuam nem entram no peso aplicado
+    scores_normalizados = np.where(validos, sinais * margens, 0.0)
+    numerador_penalidade = (scores_normalizados * pesos).sum(axis=1)
+    numerador = (np.maximum(0, scores_normalizados) * pesos).sum(axis=1)
+    denominador = np.where(validos, pesos, 0.0).sum(axis=1)
+
+    # Completude = percentual do peso total com indicadores disponíveis
+    completude = denominador / soma_pesos_total
+
+    scores = np.zeros_like(numerador)
+    scores_penalidade = np.zeros_like(numerador_penalidade)
+    np.divide(numerador, denominador, out=scores, where=denominador > 0)
+    np.divide(numerador_penalidade, denominador, out=scores_penalidade, where=denominador > 0)
+
+    # Aplicar ajuste se faltar mais de 40% dos indicadores
+    ajuste = np.where(completude < 0.6, completude, 1.0)
+
+    return scores * ajuste, scores_penalidade * ajuste, completude
+
+
 class AnalisadorFundamentalistaWSM:
     """
     Sistema de análise fundamentalista usando Weighted Scoring Model (WSM)
@@ -10,8 +60,16 @@ class AnalisadorFundamentalistaWSM:
     """
 
     def __init__(self, dataframe):
-        self.dataframe = dataframe.copy()
         self._configurar_estrutura_pesos()
+
+        # Mantém apenas as colunas lidas pelo modelo, evitando copiar o dataframe inteiro
+        colunas_necessarias = ['Subsetor', 'ticker', 'Empresa', 'Cotacao', 'Valor_de_mercado', *self.indicadores]
+        self.dataframe = dataframe.loc[:, [col for col in colunas_necessarias if col in dataframe.columns]].copy()
+
+        # Subsetor categórico: agrupamentos passam a usar códigos inteiros em vez de strings
+        if 'Subsetor' in self.dataframe.columns:
+            self.dataframe['Subsetor'] = self.dataframe['Subsetor'].astype('category')
+
         self._validar_configuracao()
 
     def _configurar_estrutura_pesos(self):
@@ -47,6 +105,17 @@ class AnalisadorFundamentalistaWSM:
             'margem_seguranca_barsi': {'relacao': 'maior_melhor', 'peso': 0.10, 'categoria': 'valuation_avancado'}
         }
 
+        # Estrutura em arrays paralelos (mesma ordem de self.indicadores) para o cálculo vetorizado
+        self._ind_names = np.array(list(self.indicadores))
+        self._pesos = np.fromiter((config['peso'] for config in self.indicadores.values()), dtype=np.float64)
+        self._sinais = np.fromiter(
+            (1 if config['relacao'] == 'maior_melhor' else -1 for config in self.indicadores.values()),
+            dtype=np.int8
+        )
+        self._adv_mask = np.array([ind in ('margem_seguranca_graham', 'margem_seguranca_barsi')
+                                   for ind in self.indicadores], dtype=bool)
+        self._soma_pesos_total = float(self._pesos.sum())
+
         # Mapeamento para exibição amigável
         self.nomes_amigaveis = {
             'PL': 'P/L',
@@ -71,7 +140,7 @@ class AnalisadorFundamentalistaWSM:
         """
         Valida a configuração do modelo WSM
         """
-        soma_pesos = sum([config['peso'] for config in self.indicadores.values()])
+        soma_pesos = self._soma_pesos_total
 
         if abs(soma_pesos - 1.0) > 0.001:
             print(f"⚠️ Aviso: Soma dos pesos ({soma_pesos:.3f}) difere de 100%")
@@ -94,220 +163,103 @@ class AnalisadorFundamentalistaWSM:
             dataframe_grupo (pd.DataFrame): DataFrame do grupo/setor
 
         Returns:
-            pd.DataFrame: DataFrame sem outliers
+            np.ndarray: Máscara booleana das empresas mantidas (sem outliers)
         """
         # if len(dataframe_grupo) <= 3: # Não remove grupos pequenos
         #     return dataframe_grupo
 
-        dataframe_limpo = dataframe_grupo.copy()
-
         indicadores_avancados = ['margem_seguranca_graham', 'margem_seguranca_barsi']
 
-        for indicador, config in self.indicadores.items():
-            if (indicador not in indicadores_avancados and
-                    indicador in dataframe_limpo.columns and
-                    dataframe_limpo[indicador].notna().sum() > 0):
-
-                try:
-                    Q1 = dataframe_limpo[indicador].quantile(0.25)
-                    Q3 = dataframe_limpo[indicador].quantile(0.75)
-                    IQR = Q3 - Q1
-
-                    if IQR > 0:  # Só aplica se há variação nos dados
-                        limite_inferior = Q1 - 1.5 * IQR
-                        limite_superior = Q3 + 1.5 * IQR
+        # Filtro sequencial, indicador a indicador: os quartis de cada indicador são calculados
+        # apenas sobre as empresas mantidas pelos indicadores anteriores
+        mantidas = np.ones(len(dataframe_grupo), dtype=bool)
 
-                        dataframe_limpo = dataframe_limpo[
-                            (dataframe_limpo[indicador] >= limite_inferior) &
-                            (dataframe_limpo[indicador] <= limite_superior)
-                            ]
+        for indicador in self.indicadores:
+            if indicador in indicadores_avancados or indicador not in dataframe_grupo.columns:
+                continue
 
-                except Exception as erro:
-                    print(f"   ⚠️ Erro ao remover outliers para {indicador}: {erro}")
+            try:
+                valores = dataframe_grupo[indicador].to_numpy(dtype=np.float64)
+                valores_mantidos = valores[mantidas]
+                if np.isnan(valores_mantidos).all():
                     continue
 
-        return dataframe_limpo
+                Q1, Q3 = np.nanquantile(valores_mantidos, [0.25, 0.75])
+                IQR = Q3 - Q1
 
-    def _normalizar_margens_avancadas(self, valor, indicador):
-        """
-        Normaliza as margens de segurança de forma especial
+                if IQR > 0:  # Só aplica se há variação nos dados
+                    limite_inferior = Q1 - 1.5 * IQR
+                    limite_superior = Q3 + 1.5 * IQR
 
-        Args:
-            valor (float): Valor da margem de segurança
-            indicador (str): Nome do indicador
+                    # Valores ausentes (NaN) também eliminam a empresa, como nas comparações do pandas
+                    mantidas &= (valores >= limite_inferior) & (valores <= limite_superior)
 
-        Returns:
-            float: Valor normalizado
-        """
-        if pd.isna(valor):
-            return 0.0
-
-        if indicador in ['margem_seguranca_graham', 'margem_seguranca_barsi']:
-            # Margem positiva = oportunidade (preço abaixo do teto)
-            # Margem negativa = sobrevalorizado (preço acima do teto)
-            if valor > 0:
-                return min(valor, 100)  # Limita em 100% para não distorcer
-            else:
-                return max(valor, -50)  # Penalidade máxima de -50%
+            except Exception as erro:
+                print(f"   ⚠️ Erro ao remover outliers para {indicador}: {erro}")
+                continue
 
-        return valor
+        return mantidas
 
-    def _calcular_medias_ponderadas_grupo(self, dataframe_grupo):
+    def _calcular_medias_ponderadas_grupo(self, dataframe):
         """
-        Calcula médias ponderadas para indicadores tradicionais do grupo
+        Calcula médias ponderadas por valor de mercado dos indicadores tradicionais de cada subsetor
 
         Args:
-            dataframe_grupo (pd.DataFrame): DataFrame do grupo/setor
+            dataframe (pd.DataFrame): DataFrame com as empresas de todos os subsetores
 
         Returns:
-            dict: Dicionário com médias ponderadas por indicador
+            pd.DataFrame: Médias ponderadas do subsetor alinhadas a cada linha (empresa)
         """
-        medias_ponderadas = {}
         indicadores_avancados = ['margem_seguranca_graham', 'margem_seguranca_barsi']
 
-        for indicador, config in self.indicadores.items():
-            # Não calcula média para indicadores avançados
-            if indicador in indicadores_avancados:
-                continue
-
-            if (indicador in dataframe_grupo.columns and
-                    'Valor_de_mercado' in dataframe_grupo.columns):
-
-                pesos = dataframe_grupo['Valor_de_mercado']
-                valores = dataframe_grupo[indicador]
-
-                mascara_dados_validos = ~valores.isna() & ~pesos.isna() & (pesos > 0)
-
-                if mascara_dados_validos.sum() > 0:
-                    valores_validos = valores[mascara_dados_validos]
-                    pesos_validos = pesos[mascara_dados_validos]
-                    try:
-                        media_ponderada = np.average(valores_validos, weights=pesos_validos)
-                        medias_ponderadas[indicador] = media_ponderada
-                    except Exception as erro:
-                        print(f"   ⚠️ Erro ao calcular média ponderada para {indicador}: {erro}")
-                        medias_ponderadas[indicador] = np.nan
-                else:
-                    medias_ponderadas[indicador] = np.nan
+        # Não calcula média para indicadores avançados
+        cols_trad = [
+            indicador for indicador in self.indicadores
+            if indicador not in indicadores_avancados and indicador in dataframe.columns
+        ]
 
-        return medias_ponderadas
+        if not cols_trad or 'Valor_de_mercado' not in dataframe.columns:
+            return pd.DataFrame(index=dataframe.index)
 
-    def _calcular_margem_relativa(self, valor_empresa, media_grupo, indicador):
-        """
-        Calcula margem relativa em relação à média do grupo
+        valores = dataframe[cols_trad].to_numpy(dtype=np.float64)
+        pesos = dataframe['Valor_de_mercado'].to_numpy(dtype=np.float64)
 
-        Args:
-            valor_empresa (float): Valor da empresa para o indicador
-            media_grupo (float): Média do grupo para o indicador
-            indicador (str): Nome do indicador
+        # Zera valores e pesos inválidos para que a soma de produtos dispense filtragem por coluna
+        mascara_dados_validos = ~np.isnan(valores) & (pesos > 0)[:, np.newaxis]
+        pesos_validos = np.where(mascara_dados_validos, pesos[:, np.newaxis], 0.0)
+        produtos = np.where(mascara_dados_validos, valores, 0.0) * pesos_validos
 
-        Returns:
-            float: Margem relativa calculada
-        """
-        # Para indicadores avançados, usa normalização direta
-        if indicador in ['margem_seguranca_graham', 'margem_seguranca_barsi']:
-            return self._normalizar_margens_avancadas(valor_empresa, indicador)
+        # Somas de produtos e de pesos de todos os indicadores em um único groupby
+        quantidade = len(cols_trad)
+        somas = (
+            pd.DataFrame(np.hstack([produtos, pesos_validos]))
+            .groupby(dataframe['Subsetor'].cat.codes.to_numpy(), sort=False)
+            .transform('sum')
+            .to_numpy()
+        )
+        numerador = somas[:, :quantidade]
+        denominador = somas[:, quantidade:]
 
-        # Para outros indicadores, calcula margem relativa ao grupo
-        if pd.isna(valor_empresa) or pd.isna(media_grupo) or media_grupo == 0:
-            return 0.0
+        medias = np.full_like(numerador, np.nan)
+        np.divide(numerador, denominador, out=medias, where=denominador > 0)
 
-        return ((valor_empresa - media_grupo) / abs(media_grupo)) * 100
+        return pd.DataFrame(medias, index=dataframe.index, columns=cols_trad)
 
-    def _normalizar_score_indicador(self, margem, tipo_relacao, penalidade=False):
+    def _obter_valores_coluna(self, dataframe, coluna, valor_padrao):
         """
-        Normaliza o score baseado no tipo de relação (maior/menor melhor)
+        Obtém os valores de uma coluna como array, ou o valor padrão se a coluna não existir
 
         Args:
-            margem (float): Margem calculada
-            tipo_relacao (str): 'maior_melhor' ou 'menor_melhor'
+            dataframe (pd.DataFrame): DataFrame de origem
+            coluna (str): Nome da coluna
+            valor_padrao: Valor usado quando a coluna está ausente
 
         Returns:
-            float: Score normalizado
-        """
-        if penalidade:
-            if tipo_relacao == 'maior_melhor':
-                return margem  # Penaliza valores abaixo da média
-            else:  # menor_melhor
-                return -margem  # Penaliza valores acima da média
-        else:
-            if tipo_relacao == 'maior_melhor':
-                return max(0, margem)  # Penaliza valores abaixo da média
-            else:  # menor_melhor
-                return max(0, -margem)  # Penaliza valores acima da média
-
-    # def _calcular_score_empresa(self, dados_empresa, medias_grupo, penalidade=False):
-    #     """
-    #     Calcula score WSM individual para uma empresa
-    #
-    #     Args:
-    #         dados_empresa (pd.Series): Dados da empresa
-    #         medias_grupo (dict): Médias do grupo/setor
-    #
-    #     Returns:
-    #         float: Score WSM final
-    #     """
-    #     scores_ponderados = []
-    #     pesos_aplicados = []
-    #
-    #     for indicador, config in self.indicadores.items():
-    #         tipo_relacao = config['relacao']
-    #         peso = config['peso']
-    #
-    #         if (indicador in dados_empresa.index and
-    #                 not pd.isna(dados_empresa[indicador])):
-    #             valor_empresa = dados_empresa[indicador]
-    #             media_grupo = medias_grupo.get(indicador, 0)
-    #
-    #             margem = self._calcular_margem_relativa(valor_empresa, media_grupo, indicador)
-    #             score_normalizado = self._normalizar_score_indicador(margem, tipo_relacao, penalidade)
-    #
-    #             scores_ponderados.append(score_normalizado * peso)
-    #             pesos_aplicados.append(peso)
-    #
-    #     # Calcular score final ponderado
-    #     if sum(pesos_aplicados) > 0:
-    #         return sum(scores_ponderados) / sum(pesos_aplicados)
-    #     else:
-    #         return 0.0
-
-    def _calcular_score_empresa(self, dados_empresa, medias_grupo, penalidade=False):
-        """
-        Calcula score WSM individual para uma empresa
-        MODIFICADO: Retorna (score, completude)
+            np.ndarray ou valor padrão
         """
-        scores_ponderados = []
-        pesos_aplicados = []
-
-        for indicador, config in self.indicadores.items():
-            tipo_relacao = config['relacao']
-            peso = config['peso']
-
-            if (indicador in dados_empresa.index and
-                    not pd.isna(dados_empresa[indicador])):
-                valor_empresa = dados_empresa[indicador]
-                media_grupo = medias_grupo.get(indicador, 0)
-
-                margem = self._calcular_margem_relativa(valor_empresa, media_grupo, indicador)
-                score_normalizado = self._normalizar_score_indicador(margem, tipo_relacao, penalidade)
-
-                scores_ponderados.append(score_normalizado * peso)
-                pesos_aplicados.append(peso)
-
-        # Calcular score final e completude
-        if sum(pesos_aplicados) > 0:
-            score_final = sum(scores_ponderados) / sum(pesos_aplicados)
-
-            # Calcular completude (percentual de indicadores disponíveis)
-            completude = sum(pesos_aplicados) / sum([config['peso'] for config in self.indicadores.values()])
-
-            # Aplicar ajuste por completude se necessário
-            if completude < 0.6:  # Se faltar mais de 40% dos indicadores
-                score_final *= completude
-
-            return score_final, completude
-        else:
-            return 0.0, 0.0  # Score zero, completude zero
+        if coluna in dataframe.columns:
+            return dataframe[coluna].to_numpy()
+        return valor_padrao
 
     def diagnosticar_empresas_sem_score_detalhado(self, dataframe_resultados):
         """
@@ -317,43 +269,50 @@ class AnalisadorFundamentalistaWSM:
         print("=" * 60)
 
         # Empresas originais vs empresas com score
-        empresas_originais = set(self.dataframe['ticker'].dropna())
-        empresas_com_score = set(dataframe_resultados['ticker'].dropna()) if not dataframe_resultados.empty else set()
-        empresas_sem_score = empresas_originais - empresas_com_score
+        tickers = self.dataframe['ticker']
+        if dataframe_resultados.empty:
+            mascara_com_score = pd.Series(False, index=tickers.index)
+        else:
+            mascara_com_score = tickers.isin(dataframe_resultados['ticker'])
+        empresas_sem_score = tickers[~mascara_com_score].dropna().unique()
 
-        print(f"Empresas originais: {len(empresas_originais)}")
-        print(f"Empresas com score: {len(empresas_com_score)}")
+        print(f"Empresas originais: {tickers.nunique()}")
+        print(f"Empresas com score: {tickers[mascara_com_score].nunique()}")
         print(f"Empresas sem score: {len(empresas_sem_score)}")
 
-        if not empresas_sem_score:
+        if len(empresas_sem_score) == 0:
             print("✅ Todas as empresas têm score!")
             return
 
         # Analisar por subsetor
         print(f"\n📊 ANÁLISE POR SUBSETOR:")
-        for subsetor in self.dataframe['Subsetor'].unique():
-            empresas_subsetor = set(self.dataframe[self.dataframe['Subsetor'] == subsetor]['ticker'])
-            empresas_subsetor_com_score = empresas_subsetor & empresas_com_score
-            empresas_subsetor_sem_score = empresas_subsetor - empresas_com_score
+        for subsetor in self.dataframe['Subsetor'].cat.categories:
+            mascara_subsetor = self.dataframe['Subsetor'] == subsetor
+            quantidade_com_score = tickers[mascara_subsetor & mascara_com_score].nunique()
+            quantidade_sem_score = tickers[mascara_subsetor & ~mascara_com_score].nunique()
 
-            if empresas_subsetor_sem_score:
+            if quantidade_sem_score:
                 print(
-                    f"  {subsetor}: {len(empresas_subsetor_com_score)} com score, {len(empresas_subsetor_sem_score)} sem score")
+                    f"  {subsetor}: {quantidade_com_score} com score, {quantidade_sem_score} sem score")
+
+        # Empresas indexadas por ticker (primeira ocorrência) para consulta por hash
+        empresas_por_ticker = self.dataframe.drop_duplicates('ticker').set_index('ticker', drop=False)
+
+        # Quantidade de indicadores presentes por empresa, contada de uma só vez
+        colunas_indicadores = [ind for ind in self.indicadores if ind in self.dataframe.columns]
+        indicadores_presentes_por_ticker = empresas_por_ticker[colunas_indicadores].notna().sum(axis=1)
 
         # Verificar 5 empresas sem score como exemplo
         print(f"\n🔎 EXEMPLOS DE EMPRESAS SEM SCORE:")
-        for ticker in list(empresas_sem_score)[:5]:
-            empresa = self.dataframe[self.dataframe['ticker'] == ticker].iloc[0]
+        for ticker in empresas_sem_score[:5]:
+            empresa = empresas_por_ticker.loc[ticker]
 
             # Verificar dados básicos
             subsetor = empresa.get('Subsetor', 'N/A')
             valor_mercado = empresa.get('Valor_de_mercado', 0)
 
             # Verificar indicadores
-            indicadores_presentes = 0
-            for indicador in self.indicadores.keys():
-                if indicador in empresa.index and not pd.isna(empresa[indicador]):
-                    indicadores_presentes += 1
+            indicadores_presentes = indicadores_presentes_por_ticker.loc[ticker]
 
             print(f"  {ticker} (Subsetor: {subsetor}):")
             print(f"    - Indicadores presentes: {indicadores_presentes}/{len(self.indicadores)}")
@@ -365,48 +324,62 @@ class AnalisadorFundamentalistaWSM:
         Executa análise fundamentalista completa usando WSM
         """
         print("🎯 Iniciando análise fundamentalista WSM...")
-        resultados = []
+        dataframe_resultados = pd.DataFrame()
+
+        # Agrupar por subsetor uma única vez para análise comparativa
+        dataframe_ordenado = self.dataframe.sort_values('Subsetor', kind='stable')
+        agrupamento = dataframe_ordenado.groupby('Subsetor', sort=False, observed=True)
+
+        # Máscara acumulada das empresas mantidas; o dataframe é fatiado uma única vez no final
+        mascara_mantidas = np.zeros(len(dataframe_ordenado), dtype=bool)
 
-        # Agrupar por subsetor para análise comparativa
-        for subsetor, grupo in self.dataframe.groupby('Subsetor'):
-            print(f"   📊 Processando subsetor: {subsetor} ({len(grupo)} empresas)")
+        for subsetor, posicoes in agrupamento.indices.items():
+            print(f"   📊 Processando subsetor: {subsetor} ({len(posicoes)} empresas)")
 
             # Remover outliers apenas para indicadores tradicionais
-            grupo_limpo = self._remover_outliers_indicadores_tradicionais(grupo)
+            mascara_grupo = self._remover_outliers_indicadores_tradicionais(dataframe_ordenado.iloc[posicoes])
 
-            if len(grupo_limpo) == 0:
+            if not mascara_grupo.any():
                 print(f"   ⚠️ Grupo {subsetor} vazio após remoção de outliers")
                 continue
 
-            # Calcular médias ponderadas do grupo
-            medias_grupo = self._calcular_medias_ponderadas_grupo(grupo_limpo)
-
-            # Calcular score para cada empresa do grupo
-            for indice, empresa in grupo_limpo.iterrows():
-                score_wsm, completude = self._calcular_score_empresa(empresa, medias_grupo, False)
-                score_wsm_penalidade, _ = self._calcular_score_empresa(empresa, medias_grupo, True)
-
-                # Coletar informações para resultado final
-                informacoes_empresa = {
-                    'empresa': empresa.get('Empresa', ''),
-                    'subsetor': subsetor,
-                    'ticker': empresa.get('ticker', ''),
-                    'preco_atual': empresa.get('Cotacao', 0),
-                    'valor_mercado': empresa.get('Valor_de_mercado', 0),
-                    'score_wsm': score_wsm,
-                    'score_wsm_penalidade': score_wsm_penalidade,
-                    'completude_indicadores': completude,
-                    'margem_graham': empresa.get('margem_seguranca_graham', 0),
-                    'margem_barsi': empresa.get('margem_seguranca_barsi', 0),
-                    'preco_lucro': empresa.get('PL', 0),
-                    'roe': empresa.get('ROE', 0),
-                    'roic': empresa.get('ROIC', 0)
-                }
-
-                resultados.append(informacoes_empresa)
-
-        # Criar DataFrame de resultados
-        dataframe_resultados = pd.DataFrame(resultados)
+            mascara_mantidas[posicoes] = mascara_grupo
+
+        if mascara_mantidas.any():
+            dataframe_limpo = dataframe_ordenado[mascara_mantidas]
+
+            # Médias ponderadas de cada subsetor, já alinhadas a cada empresa
+            medias_grupos = self._calcular_medias_ponderadas_grupo(dataframe_limpo)
+
+            # Índices dos indicadores presentes no dataframe
+            presentes = np.flatnonzero(np.isin(self._ind_names, dataframe_limpo.columns))
+            indicadores = self._ind_names[presentes]
+
+            valores = dataframe_limpo[indicadores].to_numpy(dtype=np.float64)
+            medias = medias_grupos.reindex(columns=indicadores).to_numpy(dtype=np.float64)
+
+            # Calcular score de todas as empresas de uma vez
+            scores, scores_penalidade, completudes = _score_kernel(
+                valores, medias, self._pesos[presentes], self._sinais[presentes],
+                self._adv_mask[presentes], self._soma_pesos_total
+            )
+
+            # Montar resultado final diretamente a partir das colunas
+            dataframe_resultados = pd.DataFrame({
+                'empresa': self._obter_valores_coluna(dataframe_limpo, 'Empresa', ''),
+                'subsetor': self._obter_valores_coluna(dataframe_limpo, 'Subsetor', ''),
+                'ticker': self._obter_valores_coluna(dataframe_limpo, 'ticker', ''),
+                'preco_atual': self._obter_valores_coluna(dataframe_limpo, 'Cotacao', 0),
+                'valor_mercado': self._obter_valores_coluna(dataframe_limpo, 'Valor_de_mercado', 0),
+                'score_wsm': scores,
+                'score_wsm_penalidade': scores_penalidade,
+                'completude_indicadores': completudes,
+                'margem_graham': self._obter_valores_coluna(dataframe_limpo, 'margem_seguranca_graham', 0),
+                'margem_barsi': self._obter_valores_coluna(dataframe_limpo, 'margem_seguranca_barsi', 0),
+                'preco_lucro': self._obter_valores_coluna(dataframe_limpo, 'PL', 0),
+                'roe': self._obter_valores_coluna(dataframe_limpo, 'ROE', 0),
+                'roic': self._obter_valores_coluna(dataframe_limpo, 'ROIC', 0)
+            })
 
         if not dataframe_resultados.empty:
             dataframe_resultados = dataframe_resultados.sort_values('score_wsm', ascending=False)
@@ -9,6 +9,7 @@ set "ATUALIZAR_DADOS=false"
 set "APENAS_VISUALIZACOES=false"
 set "QUANTIDADE_RANKINGS=15"
 set "EXPORTAR_DADOS=false"
+set "SEM_JANELAS=false"
 
 rem =========================================
 rem  Processar parâmetros
@@ -41,8 +42,14 @@ if "%~1"=="--exportar-dados" (
     goto process_args
 )
 
+if "%~1"=="--sem-janelas" (
+    set "SEM_JANELAS=true"
+    shift
+    goto process_args
+)
+
 echo Parâmetro desconhecido: %~1
-echo Parâmetros válidos: --atualizar-dados --apenas-visualizacoes --quantidade-rankings N --exportar-dados
+echo Parâmetros válidos: --atualizar-dados --apenas-visualizacoes --quantidade-rankings N --exportar-dados --sem-janelas
 exit /b 1
 
 :fim_args
@@ -85,6 +92,10 @@ if "%EXPORTAR_DADOS%"=="true" (
     set "COMANDO=!COMANDO! --exportar-dados"
 )
 
+if "%SEM_JANELAS%"=="true" (
+    set "COMANDO=!COMANDO! --sem-janelas"
+)
+
 echo Executando: !COMANDO!
 echo.
 
@@ -6,6 +6,7 @@ ATUALIZAR_DADOS=false
 APENAS_VISUALIZACOES=false
 QUANTIDADE_RANKINGS=15
 EXPORTAR_DADOS=false
+SEM_JANELAS=false
 
 # Processar parâmetros
 while [[ $# -gt 0 ]]; do
@@ -26,9 +27,13 @@ while [[ $# -gt 0 ]]; do
             EXPORTAR_DADOS=true
             shift
             ;;
+        --sem-janelas)
+            SEM_JANELAS=true
+            shift
+            ;;
         *)
             echo "Parâmetro desconhecido: $1"
-            echo "Parâmetros válidos: --atualizar-dados --apenas-visualizacoes --quantidade-rankings N --exportar-dados"
+            echo "Parâmetros válidos: --atualizar-dados --apenas-visualizacoes --quantidade-rankings N --exportar-dados --sem-janelas"
             exit 1
             ;;
     esac
@@ -73,6 +78,10 @@ if [ "$EXPORTAR_DADOS" = true ]; then
     COMANDO="$COMANDO --exportar-dados"
 fi
 
+if [ "$SEM_JANELAS" = true ]; then
+    COMANDO="$COMANDO --sem-janelas"
+fi
+
 echo "Executando: $COMANDO"
 echo ""
 
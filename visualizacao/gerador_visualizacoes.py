@@ -1,7 +1,171 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 import os
+from visualizacao.utilitarios_graficos import (
+    OPCOES_PNG, aplicar_estilo_graficos, executar_tarefas_em_processos, top_k_indices
+)
+
+
+# Diretórios de saída já criados neste processo (caminho absoluto, pois o destino é relativo ao cwd)
+_DIRETORIOS_CRIADOS = set()
+
+
+def _desenhar_barras_ranking(eixo, tickers, margens, titulo, estilos):
+    """
+    Desenha um gráfico de barras de ranking de margens
+
+    Args:
+        eixo (matplotlib.axes.Axes): Eixo onde plotar o gráfico
+        tickers (np.ndarray): Tickers do ranking
+        margens (np.ndarray): Valores de margem de cada ticker
+        titulo (str): Título do gráfico
+        estilos (dict): Estilos de títulos, eixos e legendas
+    """
+    posicoes_y = range(len(tickers))
+    barras = eixo.barh(posicoes_y, margens)
+    eixo.set_yticks(posicoes_y, labels=tickers)
+    eixo.set_title(titulo, **estilos['titulos'])
+    eixo.set_xlabel('Margem de Segurança (%)', **estilos['eixos'])
+    eixo.grid(axis='x', alpha=0.3)
+
+    # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+    eixo.bar_label(
+        barras,
+        labels=[f'{margem:.1f}%' for margem in margens],
+        padding=3,
+        fontweight='bold',
+        fontsize=9
+    )
+
+
+def _desenhar_barras_wsm(eixo, tickers, scores, titulo, estilos):
+    """
+    Desenha um gráfico individual de ranking WSM
+
+    Args:
+        eixo (matplotlib.axes.Axes): Eixo para plotagem
+        tickers (np.ndarray): Tickers do ranking
+        scores (np.ndarray): Scores WSM correspondentes
+        titulo (str): Título do gráfico
+        estilos (dict): Estilos de títulos, eixos e legendas
+    """
+    posicoes_y = range(len(tickers))
+    barras = eixo.barh(posicoes_y, scores)
+    eixo.set_yticks(posicoes_y, labels=tickers)
+    eixo.set_title(titulo, **estilos['titulos'])
+    eixo.set_xlabel('Score WSM', **estilos['eixos'])
+    eixo.grid(True, axis='x', alpha=0.3)
+    eixo.set_axisbelow(True)
+
+    # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+    eixo.bar_label(
+        barras,
+        labels=[f'{score:.1f}' for score in scores],
+        padding=3,
+        fontweight='bold',
+        fontsize=9
+    )
+
+
+def _desenhar_ranking_metodologias(figura, dados, estilos):
+    """
+    Desenha os rankings das três metodologias lado a lado
+
+    Args:
+        figura (matplotlib.figure.Figure): Figura de destino
+        dados (dict): Rankings preparados por GeradorVisualizacoes._dados_ranking_metodologias
+        estilos (dict): Estilos de títulos, eixos e legendas
+    """
+    eixos = figura.subplots(1, 3)
+    figura.suptitle('RANKING COMPARATIVO - METODOLOGIAS DE VALUATION',
+                    fontsize=16, fontweight='bold')
+
+    for eixo, ranking in zip(eixos, dados['rankings']):
+        if ranking is not None:
+            _desenhar_barras_ranking(eixo, *ranking, estilos)
+
+
+def _desenhar_consolidado(figura, dados, estilos):
+    """
+    Desenha o gráfico de barras agrupadas da visão consolidada
+
+    Args:
+        figura (matplotlib.figure.Figure): Figura de destino
+        dados (dict): Matriz ticker × metodologia preparada por GeradorVisualizacoes._dados_consolidado
+        estilos (dict): Estilos de títulos, eixos e legendas
+    """
+    eixo = figura.subplots()
+    tickers_unicos = dados['tickers']
+    matriz_margens = dados['matriz_margens']
+    nomes_metodologias = dados['metodologias']
+
+    # Criar gráfico de barras agrupadas (uma chamada barh por metodologia)
+    posicoes_y = np.arange(len(tickers_unicos))
+    altura_barra = 0.8 / len(nomes_metodologias)
+    for posicao_metodologia, metodologia in enumerate(nomes_metodologias):
+        valores = matriz_margens[:, posicao_metodologia]
+        presentes = ~np.isnan(valores)
+        deslocamento = (posicao_metodologia - (len(nomes_metodologias) - 1) / 2) * altura_barra
+        eixo.barh(
+            posicoes_y[presentes] + deslocamento,
+            valores[presentes],
+            height=altura_barra,
+            color=dados['cores'][posicao_metodologia],
+            label=metodologia
+        )
+
+    eixo.set_yticks(posicoes_y, labels=tickers_unicos)
+    eixo.set_ylim(len(tickers_unicos) - 0.5, -0.5)
+    eixo.set_title(
+        f"TOP {dados['top_empresas']} OPORTUNIDADES - VISÃO CONSOLIDADA",
+        **estilos['titulos']
+    )
+    eixo.set_xlabel('Margem de Segurança / Desconto (%)', **estilos['eixos'])
+    eixo.set_ylabel('Ticker', **estilos['eixos'])
+    eixo.legend(**estilos['legendas'])
+
+
+def _desenhar_comparacao_pesos_wsm(figura, dados, estilos):
+    """
+    Desenha os rankings WSM dos dois cenários de pesos lado a lado
+
+    Args:
+        figura (matplotlib.figure.Figure): Figura de destino
+        dados (dict): Cenários preparados por GeradorVisualizacoes._dados_comparacao_pesos_wsm
+        estilos (dict): Estilos de títulos, eixos e legendas
+    """
+    eixos = figura.subplots(1, 2)
+    figura.suptitle('COMPARAÇÃO WSM - ESTRUTURAS DE PESOS DIFERENTES',
+                    fontsize=16, fontweight='bold')
+
+    for eixo, cenario in zip(eixos, dados['cenarios']):
+        _desenhar_barras_wsm(eixo, *cenario, estilos)
+
+
+def _renderizar_em_arquivo(desenhar, tamanho_figura, dados, estilos, caminho_figura, dpi):
+    """
+    Renderiza um gráfico direto em PNG, sem pyplot (executado nos processos do relatório)
+
+    O estilo global já vem aplicado do processo principal (herdado via fork).
+
+    Args:
+        desenhar (callable): Função de desenho do módulo
+        tamanho_figura (tuple): Tamanho da figura em polegadas
+        dados (dict): Dados já preparados para o gráfico
+        estilos (dict): Estilos de títulos, eixos e legendas
+        caminho_figura (str): Caminho do arquivo PNG
+        dpi (int): Resolução do PNG
+
+    Returns:
+        str: Caminho do arquivo salvo
+    """
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=tamanho_figura)
+    desenhar(figura, dados, estilos)
+    figura.tight_layout()
+    figura.savefig(caminho_figura, dpi=dpi, pil_kwargs=OPCOES_PNG)
+    return caminho_figura
 
 
 class GeradorVisualizacoes:
@@ -10,6 +174,16 @@ class GeradorVisualizacoes:
     Gera relatórios visuais comparativos entre diferentes metodologias de valuation
     """
 
+    # Configurações de estilo consistentes (compartilhadas por todas as instâncias)
+    estilo_titulos = {'fontsize': 12, 'fontweight': 'bold', 'pad': 10}
+    estilo_eixos = {'fontsize': 10}
+    estilo_legendas = {'fontsize': 9}
+    _estilos = {
+        'titulos': estilo_titulos,
+        'eixos': estilo_eixos,
+        'legendas': estilo_legendas
+    }
+
     def __init__(self, dataframe):
         """
         Inicializa o gerador de visualizações
@@ -17,94 +191,131 @@ class GeradorVisualizacoes:
         Args:
             dataframe (pd.DataFrame): DataFrame com os dados das análises
         """
-        self.dataframe = dataframe
-        self._configurar_estilo_graficos()
-        self._criar_diretorio_analises()
-
-    def _configurar_estilo_graficos(self):
-        """Configura o estilo padrão para todos os gráficos"""
-        plt.style.use('default')
-        sns.set_palette("husl")
+        # Índice posicional único: as seleções de top-k usam iloc e dependem dele.
+        # Não reintroduzir índice duplicado (ex.: concat sem ignore_index) depois daqui.
+        self.dataframe = dataframe.reset_index(drop=True)
+        self._colunas = frozenset(self.dataframe.columns)
+
+        # Margens convertidas e tickers calculados uma única vez para todos os gráficos
+        self._margens = self._converter_colunas_numericas()
+        self._tickers = self.dataframe['ticker'].to_numpy()
+
+        # Demais colunas convertidas sob demanda (ex.: nomes antigos das margens), uma vez cada
+        self._valores_convertidos = dict(self._margens)
+
+        # Ordem decrescente de cada coluna numérica, reaproveitada por gráficos e tabelas
+        self._ordens = {}
+
+        # Colunas exibidas nas tabelas do console, convertidas uma única vez para arrays
+        self._arrays = {
+            coluna: self.dataframe[coluna].to_numpy()
+            for coluna in ('empresa', 'Empresa', 'preco_atual', 'Cotacao',
+                           'preco_teto_graham', 'preco_teto_barsi', 'preco_alvo_pl_setor')
+            if coluna in self._colunas
+        }
+        self._arrays['ticker'] = self._tickers
+        self._arrays.update(self._margens)
+
+        # Matriz contígua R×3 (Graham, Barsi, P/L setor) com NaN/ausentes já zerados para o WSM
+        self._matriz_margens = np.column_stack([
+            self._margens.get(coluna, np.zeros(len(self.dataframe)))
+            for coluna in ('margem_seguranca_graham', 'margem_seguranca_barsi', 'margem_seguranca_pl_setor')
+        ])
+        self._matriz_margens[np.isnan(self._matriz_margens)] = 0.0
 
-        # Configurações de estilo consistentes
-        self.estilo_titulos = {'fontsize': 12, 'fontweight': 'bold', 'pad': 10}
-        self.estilo_eixos = {'fontsize': 10}
-        self.estilo_legendas = {'fontsize': 9}
+        self._criar_diretorio_analises()
 
     def _criar_diretorio_analises(self):
-        """Cria o diretório para análises se não existir"""
-        os.makedirs('output/graficos', exist_ok=True)
+        """Cria o diretório para análises se não existir (uma vez por processo)"""
+        diretorio = os.path.abspath('output/graficos')
+        if diretorio not in _DIRETORIOS_CRIADOS:
+            os.makedirs(diretorio, exist_ok=True)
+            _DIRETORIOS_CRIADOS.add(diretorio)
 
-    def gerar_graficos_ranking_metodologias(self, top_empresas=15):
+    def gerar_graficos_ranking_metodologias(self, top_empresas=15, batch=False, dpi=150):
         """
         Cria gráficos de ranking comparativo para as três metodologias
 
         Args:
             top_empresas (int): Número de empresas a mostrar em cada ranking
+            batch (bool): Execução em lote (não exibe a figura e a fecha após salvar)
+            dpi (int): Resolução do PNG salvo (use 300 para impressão)
         """
-        # Garantir que as colunas são numéricas
-        dataframe_temp = self.dataframe.copy()
-        dataframe_temp = self._converter_colunas_numericas(dataframe_temp)
+        import matplotlib.pyplot as plt
 
-        figura, eixos = plt.subplots(1, 3, figsize=(20, 6))
-        figura.suptitle('RANKING COMPARATIVO - METODOLOGIAS DE VALUATION',
-                        fontsize=16, fontweight='bold')
+        aplicar_estilo_graficos()
 
-        # 1. RANKING GRAHAM
-        if 'margem_seguranca_graham' in dataframe_temp.columns:
-            dataframe_graham = dataframe_temp[
-                dataframe_temp['margem_seguranca_graham'].notna()
-            ].nlargest(top_empresas, 'margem_seguranca_graham')
+        figura = plt.figure(figsize=(20, 6))
+        _desenhar_ranking_metodologias(figura, self._dados_ranking_metodologias(top_empresas), self._estilos)
+        figura.tight_layout()
 
-            if not dataframe_graham.empty:
-                self._criar_grafico_barras_ranking(
-                    eixos[0], dataframe_graham, 'margem_seguranca_graham',
-                    f'TOP {top_empresas} - MARGENS GRAHAM'
-                )
+        self._salvar_figura(
+            figura, 'output/graficos/ranking_metodologias.png', 'Gráfico de rankings', batch, dpi
+        )
+        return figura
 
-        # 2. RANKING BARSI
-        if 'margem_seguranca_barsi' in dataframe_temp.columns:
-            dataframe_barsi = dataframe_temp[
-                dataframe_temp['margem_seguranca_barsi'].notna()
-            ].nlargest(top_empresas, 'margem_seguranca_barsi')
+    def _dados_ranking_metodologias(self, top_empresas):
+        """
+        Prepara os rankings (tickers, margens e título) de cada metodologia
 
-            if not dataframe_barsi.empty:
-                self._criar_grafico_barras_ranking(
-                    eixos[1], dataframe_barsi, 'margem_seguranca_barsi',
-                    f'TOP {top_empresas} - MARGENS BARSI'
-                )
+        Args:
+            top_empresas (int): Número de empresas em cada ranking
 
-        # 3. RANKING PL DESCONTAO
-        if 'margem_seguranca_pl_setor' in dataframe_temp.columns:
-            dataframe_pl_desc = dataframe_temp[
-                dataframe_temp['margem_seguranca_pl_setor'].notna()
-            ].nlargest(top_empresas, 'margem_seguranca_pl_setor')
+        Returns:
+            dict: Rankings na ordem Graham, Barsi, P/L setor (None quando sem dados)
+        """
+        rankings = [
+            # 1. RANKING GRAHAM
+            ('margem_seguranca_graham', f'TOP {top_empresas} - MARGENS GRAHAM'),
+            # 2. RANKING BARSI
+            ('margem_seguranca_barsi', f'TOP {top_empresas} - MARGENS BARSI'),
+            # 3. RANKING PL DESCONTAO
+            ('margem_seguranca_pl_setor', f'TOP {top_empresas} - DESCONTOS P/L SETOR')
+        ]
 
-            if not dataframe_pl_desc.empty:
-                self._criar_grafico_barras_ranking(
-                    eixos[2], dataframe_pl_desc, 'margem_seguranca_pl_setor',
-                    f'TOP {top_empresas} - DESCONTOS P/L SETOR'
-                )
+        dados_rankings = []
+        for coluna_margem, titulo in rankings:
+            indices_top = []
+            if coluna_margem in self._margens:
+                valores = self._margens[coluna_margem]
+                indices_top = self._indices_top(coluna_margem, top_empresas)
 
-        plt.tight_layout()
+            if len(indices_top) == 0:
+                dados_rankings.append(None)
+                continue
 
-        # Salvar figura
-        caminho_figura = 'output/graficos/ranking_metodologias.png'
-        plt.savefig(caminho_figura, dpi=300, bbox_inches='tight')
-        print(f"📊 Gráfico de rankings salvo: {caminho_figura}")
+            dados_rankings.append((self._tickers[indices_top], valores[indices_top], titulo))
 
-        plt.show()
-        return figura
+        return {'rankings': dados_rankings}
 
-    def _converter_colunas_numericas(self, dataframe):
+    def _salvar_figura(self, figura, caminho_figura, descricao, batch, dpi):
         """
-        Converte colunas de margens para formato numérico
+        Salva a figura em PNG e a exibe (modo interativo) ou fecha (modo lote)
 
         Args:
-            dataframe (pd.DataFrame): DataFrame a ser convertido
+            figura (matplotlib.figure.Figure): Figura a salvar
+            caminho_figura (str): Caminho do arquivo PNG
+            descricao (str): Descrição usada na mensagem de log
+            batch (bool): Execução em lote
+            dpi (int): Resolução do PNG
+        """
+        import matplotlib.pyplot as plt
+
+        figura.savefig(caminho_figura, dpi=dpi, pil_kwargs=OPCOES_PNG)
+        print(f"📊 {descricao} salvo: {caminho_figura}")
+
+        if batch:
+            # Libera a memória da figura; o objeto continua válido para quem o recebeu
+            plt.close(figura)
+        else:
+            plt.show()
+
+    def _converter_colunas_numericas(self):
+        """
+        Converte colunas de margens para formato numérico
 
         Returns:
-            pd.DataFrame: DataFrame com colunas convertidas
+            dict: Arrays numéricos (float64) por coluna, apenas para as colunas presentes
         """
         colunas_margens = [
             'margem_seguranca_graham',
@@ -112,110 +323,130 @@ class GeradorVisualizacoes:
             'margem_seguranca_pl_setor'
         ]
 
-        for coluna in colunas_margens:
-            if coluna in dataframe.columns:
-                dataframe[coluna] = pd.to_numeric(dataframe[coluna], errors='coerce')
+        return {
+            coluna: pd.to_numeric(self.dataframe[coluna], errors='coerce').to_numpy(dtype=np.float64)
+            for coluna in colunas_margens
+            if coluna in self._colunas
+        }
+
+    def _valores_numericos(self, coluna):
+        """
+        Obtém os valores de uma coluna como array numérico (float64)
+
+        Args:
+            coluna (str): Nome da coluna
+
+        Returns:
+            np.ndarray: Valores convertidos (NaN onde não numérico)
+        """
+        if coluna not in self._valores_convertidos:
+            self._valores_convertidos[coluna] = pd.to_numeric(
+                self.dataframe[coluna], errors='coerce'
+            ).to_numpy(dtype=np.float64)
 
-        return dataframe
+        return self._valores_convertidos[coluna]
 
-    def _criar_grafico_barras_ranking(self, eixo, dataframe, coluna_margem, titulo):
+    def _indices_top(self, coluna, quantidade):
         """
-        Método auxiliar para criar gráfico de barras de ranking
+        Obtém os índices dos maiores valores de uma coluna, ignorando NaN, em ordem decrescente
+
+        A ordem completa da coluna é calculada uma única vez (ordenação estável, empates na ordem
+        de aparição como no nlargest) e cada ranking apenas recorta o seu início
 
         Args:
-            eixo (matplotlib.axes.Axes): Eixo onde plotar o gráfico
-            dataframe (pd.DataFrame): Dados para o ranking
-            coluna_margem (str): Coluna com os valores de margem
-            titulo (str): Título do gráfico
-        """
-        barras = eixo.barh(range(len(dataframe)), dataframe[coluna_margem])
-        eixo.set_yticks(range(len(dataframe)))
-        eixo.set_yticklabels(dataframe['ticker'])
-        eixo.set_title(titulo, **self.estilo_titulos)
-        eixo.set_xlabel('Margem de Segurança (%)', **self.estilo_eixos)
-        eixo.grid(axis='x', alpha=0.3)
-
-        # Adicionar valores nas barras
-        for indice, barra in enumerate(barras):
-            largura = barra.get_width()
-            eixo.text(
-                largura + 1,
-                barra.get_y() + barra.get_height() / 2,
-                f'{largura:.1f}%',
-                ha='left',
-                va='center',
-                fontweight='bold',
-                fontsize=9
-            )
+            coluna (str): Nome da coluna numérica
+            quantidade (int): Número de posições do ranking
 
-    def gerar_grafico_consolidado(self, top_empresas=10):
+        Returns:
+            np.ndarray: Índices posicionais do top-k
+        """
+        if coluna not in self._ordens:
+            valores = self._valores_numericos(coluna)
+            ordem = np.argsort(-valores, kind='stable')
+            # NaN fica no fim da ordenação; mantém apenas os valores válidos
+            self._ordens[coluna] = ordem[:np.count_nonzero(~np.isnan(valores))]
+
+        return self._ordens[coluna][:max(quantidade, 0)]
+
+    def gerar_grafico_consolidado(self, top_empresas=10, batch=False, dpi=150):
         """
         Cria gráfico consolidado com as melhores oportunidades de todas as metodologias
 
         Args:
             top_empresas (int): Número de empresas por metodologia
+            batch (bool): Execução em lote (não exibe a figura e a fecha após salvar)
+            dpi (int): Resolução do PNG salvo (use 300 para impressão)
         """
-        figura, eixo = plt.subplots(figsize=(12, 8))
+        import matplotlib.pyplot as plt
 
-        rankings_consolidados = []
+        aplicar_estilo_graficos()
 
-        # Coletar top empresas de cada metodologia
-        if 'margem_seguranca_graham' in self.dataframe.columns:
-            top_graham = self.dataframe.nlargest(top_empresas, 'margem_seguranca_graham')[
-                ['ticker', 'margem_seguranca_graham']
-            ]
-            top_graham['metodologia'] = 'Graham'
-            top_graham = top_graham.rename(columns={'margem_seguranca_graham': 'margem'})
-            rankings_consolidados.append(top_graham)
-
-        if 'margem_seguranca_barsi' in self.dataframe.columns:
-            top_barsi = self.dataframe.nlargest(top_empresas, 'margem_seguranca_barsi')[
-                ['ticker', 'margem_seguranca_barsi']
-            ]
-            top_barsi['metodologia'] = 'Barsi'
-            top_barsi = top_barsi.rename(columns={'margem_seguranca_barsi': 'margem'})
-            rankings_consolidados.append(top_barsi)
-
-        if 'margem_seguranca_pl_setor' in self.dataframe.columns:
-            top_pl_setor = self.dataframe.nlargest(top_empresas, 'margem_seguranca_pl_setor')[
-                ['ticker', 'margem_seguranca_pl_setor']
-            ]
-            top_pl_setor['metodologia'] = 'P/L Descontado'
-            top_pl_setor = top_pl_setor.rename(columns={'margem_seguranca_pl_setor': 'margem'})
-            rankings_consolidados.append(top_pl_setor)
-
-        if rankings_consolidados:
-            dataframe_consolidado = pd.concat(rankings_consolidados, ignore_index=True)
-
-            # Criar gráfico de barras agrupadas
-            sns.barplot(
-                data=dataframe_consolidado,
-                x='margem',
-                y='ticker',
-                hue='metodologia',
-                ax=eixo
-            )
-            eixo.set_title(
-                f'TOP {top_empresas} OPORTUNIDADES - VISÃO CONSOLIDADA',
-                **self.estilo_titulos
-            )
-            eixo.set_xlabel('Margem de Segurança / Desconto (%)', **self.estilo_eixos)
-            eixo.set_ylabel('Ticker', **self.estilo_eixos)
-            eixo.legend(**self.estilo_legendas)
+        dados = self._dados_consolidado(top_empresas)
+        if dados is None:
+            print("⚠️ Nenhum dado disponível para gerar gráfico consolidado")
+            return None
 
-            plt.tight_layout()
+        figura = plt.figure(figsize=(12, 8))
+        _desenhar_consolidado(figura, dados, self._estilos)
+        figura.tight_layout()
 
-            # Salvar figura
-            caminho_figura = 'output/graficos/ranking_consolidado.png'
-            plt.savefig(caminho_figura, dpi=300, bbox_inches='tight')
-            print(f"📊 Gráfico consolidado salvo: {caminho_figura}")
+        self._salvar_figura(
+            figura, 'output/graficos/ranking_consolidado.png', 'Gráfico consolidado', batch, dpi
+        )
+        return figura
 
-            plt.show()
-            return figura
-        else:
-            print("⚠️ Nenhum dado disponível para gerar gráfico consolidado")
+    def _dados_consolidado(self, top_empresas):
+        """
+        Prepara a matriz ticker × metodologia com o top de cada metodologia
+
+        Args:
+            top_empresas (int): Número de empresas por metodologia
+
+        Returns:
+            dict: Tickers, matriz de margens, metodologias e cores (None quando sem dados)
+        """
+        import seaborn as sns
+
+        margens = self._margens
+        indices_por_metodologia = []
+        nomes_metodologias = []
+
+        metodologias = [
+            ('margem_seguranca_graham', 'Graham'),
+            ('margem_seguranca_barsi', 'Barsi'),
+            ('margem_seguranca_pl_setor', 'P/L Descontado')
+        ]
+
+        # Coletar top empresas de cada metodologia
+        for coluna_margem, metodologia in metodologias:
+            if coluna_margem in margens:
+                indices_por_metodologia.append(
+                    (coluna_margem, self._indices_top(coluna_margem, top_empresas))
+                )
+                nomes_metodologias.append(metodologia)
+
+        if not indices_por_metodologia:
             return None
 
+        # Tickers únicos na ordem de aparição e matriz larga (ticker × metodologia)
+        codigos_tickers, tickers_unicos = pd.factorize(
+            np.concatenate([self._tickers[indices] for _, indices in indices_por_metodologia])
+        )
+        matriz_margens = np.full((len(tickers_unicos), len(indices_por_metodologia)), np.nan)
+        inicio = 0
+        for posicao_metodologia, (coluna_margem, indices) in enumerate(indices_por_metodologia):
+            fim = inicio + len(indices)
+            matriz_margens[codigos_tickers[inicio:fim], posicao_metodologia] = margens[coluna_margem][indices]
+            inicio = fim
+
+        return {
+            'top_empresas': top_empresas,
+            'tickers': tickers_unicos,
+            'matriz_margens': matriz_margens,
+            'metodologias': nomes_metodologias,
+            'cores': sns.color_palette(n_colors=len(nomes_metodologias), desat=0.75)
+        }
+
     def exibir_tabelas_ranking_console(self, top_empresas=10):
         """
         Exibe tabelas com os rankings formatados no console
@@ -225,7 +456,7 @@ class GeradorVisualizacoes:
         print("=" * 80)
 
         # CORREÇÃO: Verificar colunas disponíveis
-        colunas_disponiveis = self.dataframe.columns
+        colunas_disponiveis = self._colunas
 
         # Determinar nomes das colunas
         coluna_preco = 'preco_atual' if 'preco_atual' in colunas_disponiveis else 'Cotacao'
@@ -238,8 +469,8 @@ class GeradorVisualizacoes:
             colunas_graham = ['ticker', coluna_empresa, coluna_graham, 'preco_teto_graham', coluna_preco]
             colunas_graham = [col for col in colunas_graham if col in colunas_disponiveis]
 
-            top_graham = self.dataframe.nlargest(top_empresas, coluna_graham)[colunas_graham].round(2)
-            print(top_graham.to_string(index=False))
+            indices_top = self._indices_top(coluna_graham, top_empresas)
+            print(self._formatar_tabela_ranking(colunas_graham, indices_top))
         else:
             print("\n❌ GRAHAM: Nenhum dado disponível")
 
@@ -250,8 +481,8 @@ class GeradorVisualizacoes:
             colunas_barsi = ['ticker', coluna_empresa, coluna_barsi, 'preco_teto_barsi', coluna_preco]
             colunas_barsi = [col for col in colunas_barsi if col in colunas_disponiveis]
 
-            top_barsi = self.dataframe.nlargest(top_empresas, coluna_barsi)[colunas_barsi].round(2)
-            print(top_barsi.to_string(index=False))
+            indices_top = self._indices_top(coluna_barsi, top_empresas)
+            print(self._formatar_tabela_ranking(colunas_barsi, indices_top))
         else:
             print("\n❌ BARSI: Nenhum dado disponível")
 
@@ -262,22 +493,63 @@ class GeradorVisualizacoes:
             colunas_pl = ['ticker', coluna_empresa, coluna_pl_setor, 'preco_alvo_pl_setor', coluna_preco]
             colunas_pl = [col for col in colunas_pl if col in colunas_disponiveis]
 
-            top_pl_setor = self.dataframe.nlargest(top_empresas, coluna_pl_setor)[colunas_pl].round(2)
-            print(top_pl_setor.to_string(index=False))
+            indices_top = self._indices_top(coluna_pl_setor, top_empresas)
+            print(self._formatar_tabela_ranking(colunas_pl, indices_top))
         else:
             print("\n❌ P/L DESCONTAO: Nenhum dado disponível")
 
-    def gerar_graficos_comparacao_pesos_wsm(self, top_empresas=15):
+    def _formatar_tabela_ranking(self, colunas, indices):
+        """
+        Formata as linhas selecionadas como tabela de texto (mesma saída do to_string do pandas)
+
+        Args:
+            colunas (list): Colunas a exibir
+            indices (np.ndarray): Índices posicionais das linhas, já na ordem do ranking
+
+        Returns:
+            str: Tabela formatada (valores numéricos arredondados em 2 casas decimais)
+        """
+        # Monta um dataframe só com as linhas do ranking a partir dos arrays já convertidos;
+        # a formatação por coluna (casas decimais, inteiros, NaN) fica a cargo do pandas
+        for coluna in colunas:
+            if coluna not in self._arrays:
+                self._arrays[coluna] = self.dataframe[coluna].to_numpy()
+
+        tabela = pd.DataFrame({coluna: self._arrays[coluna][indices] for coluna in colunas})
+        return tabela.round(2).to_string(index=False)
+
+    def gerar_graficos_comparacao_pesos_wsm(self, top_empresas=15, batch=False, dpi=150):
         """
         Cria gráficos comparativos WSM com diferentes estruturas de pesos
 
         Args:
             top_empresas (int): Número de empresas a mostrar
+            batch (bool): Execução em lote (não exibe a figura e a fecha após salvar)
+            dpi (int): Resolução do PNG salvo (use 300 para impressão)
+        """
+        import matplotlib.pyplot as plt
+
+        aplicar_estilo_graficos()
+
+        figura = plt.figure(figsize=(18, 8))
+        _desenhar_comparacao_pesos_wsm(figura, self._dados_comparacao_pesos_wsm(top_empresas), self._estilos)
+        figura.tight_layout()
+
+        self._salvar_figura(
+            figura, 'output/graficos/comparacao_pesos_wsm.png', 'Gráfico WSM comparativo', batch, dpi
+        )
+        return figura
+
+    def _dados_comparacao_pesos_wsm(self, top_empresas):
         """
-        # Garantir colunas numéricas
-        dataframe_temp = self.dataframe.copy()
-        dataframe_temp = self._converter_colunas_numericas(dataframe_temp)
+        Prepara os rankings WSM de dois cenários de pesos
+
+        Args:
+            top_empresas (int): Número de empresas em cada ranking
 
+        Returns:
+            dict: Cenários (tickers, scores e título) na ordem de exibição
+        """
         peso_graham_1 = 0.6
         peso_barsi_1 = 0.4
 
@@ -285,137 +557,98 @@ class GeradorVisualizacoes:
         peso_barsi_2 = 0.2
         peso_pl_setor_2 = 0.3
 
-        # Calcular rankings com diferentes pesos
-        ranking_cenario_1 = self._calcular_score_wsm(
-            dataframe_temp,
+        # Calcular scores com diferentes pesos
+        scores_cenario_1 = self._calcular_score_wsm(
             peso_graham=peso_graham_1,
             peso_barsi=peso_barsi_1
         )
-        ranking_cenario_2 = self._calcular_score_wsm(
-            dataframe_temp,
+        scores_cenario_2 = self._calcular_score_wsm(
             peso_graham=peso_graham_2,
             peso_barsi=peso_barsi_2,
             peso_pl_setor=peso_pl_setor_2
         )
 
-        figura, eixos = plt.subplots(1, 2, figsize=(18, 8))
-        figura.suptitle('COMPARAÇÃO WSM - ESTRUTURAS DE PESOS DIFERENTES',
-                        fontsize=16, fontweight='bold')
-
         # Gráfico esquerdo: Graham (0.6) + Barsi (0.4)
-        dataframe_esquerdo = ranking_cenario_1.head(top_empresas)
-        self._criar_grafico_wsm_individual(
-            eixos[0], dataframe_esquerdo,
-            f'Cenário 1: Graham ({peso_graham_1}) + Barsi ({peso_barsi_1})'
-        )
-
+        indices_esquerdo = top_k_indices(scores_cenario_1, top_empresas)
         # Gráfico direito: Graham (0.5) + Barsi (0.2) + PL Setor (0.3)
-        dataframe_direito = ranking_cenario_2.head(top_empresas)
-        self._criar_grafico_wsm_individual(
-            eixos[1], dataframe_direito,
-            f'Cenário 2: Graham ({peso_graham_2}) + Barsi ({peso_barsi_2}) + P/L Setor ({peso_pl_setor_2})'
-        )
-
-        plt.tight_layout()
-
-        # Salvar figura
-        caminho_figura = 'output/graficos/comparacao_pesos_wsm.png'
-        plt.savefig(caminho_figura, dpi=300, bbox_inches='tight')
-        print(f"📊 Gráfico WSM comparativo salvo: {caminho_figura}")
-
-        plt.show()
-        return figura
+        indices_direito = top_k_indices(scores_cenario_2, top_empresas)
+
+        return {'cenarios': [
+            (
+                self._tickers[indices_esquerdo], scores_cenario_1[indices_esquerdo],
+                f'Cenário 1: Graham ({peso_graham_1}) + Barsi ({peso_barsi_1})'
+            ),
+            (
+                self._tickers[indices_direito], scores_cenario_2[indices_direito],
+                f'Cenário 2: Graham ({peso_graham_2}) + Barsi ({peso_barsi_2}) + P/L Setor ({peso_pl_setor_2})'
+            )
+        ]}
 
-    def _calcular_score_wsm(self, dataframe, peso_graham=0.5, peso_barsi=0.5, peso_pl_setor=0.0):
+    def _calcular_score_wsm(self, peso_graham=0.5, peso_barsi=0.5, peso_pl_setor=0.0):
         """
         Calcula score WSM com pesos customizados
 
         Args:
-            dataframe (pd.DataFrame): DataFrame com dados
             peso_graham (float): Peso para margem Graham
             peso_barsi (float): Peso para margem Barsi
             peso_pl_setor (float): Peso para margem P/L setor
 
         Returns:
-            pd.DataFrame: DataFrame ordenado por score WSM
-        """
-        try:
-            # Criar cópia para cálculo
-            dataframe_wsm = dataframe.copy()
-            dataframe_wsm['score_wsm'] = 0.0
-
-            # Adicionar componentes ao score
-            if 'margem_seguranca_graham' in dataframe_wsm.columns:
-                dataframe_wsm['score_wsm'] += (
-                        dataframe_wsm['margem_seguranca_graham'].fillna(0) * peso_graham
-                )
-
-            if 'margem_seguranca_barsi' in dataframe_wsm.columns:
-                dataframe_wsm['score_wsm'] += (
-                        dataframe_wsm['margem_seguranca_barsi'].fillna(0) * peso_barsi
-                )
-
-            if 'margem_seguranca_pl_setor' in dataframe_wsm.columns and peso_pl_setor > 0:
-                dataframe_wsm['score_wsm'] += (
-                        dataframe_wsm['margem_seguranca_pl_setor'].fillna(0) * peso_pl_setor
-                )
-
-            return dataframe_wsm.sort_values('score_wsm', ascending=False)
-
-        except Exception as erro:
-            print(f"❌ Erro ao calcular score WSM: {erro}")
-            return dataframe
-
-    def _criar_grafico_wsm_individual(self, eixo, dataframe, titulo):
+            np.ndarray: Score WSM de cada empresa (margens ausentes contam como zero)
         """
-        Cria gráfico individual de ranking WSM
+        pesos = np.array([peso_graham, peso_barsi, peso_pl_setor], dtype=np.float64)
 
-        Args:
-            eixo (matplotlib.axes.Axes): Eixo para plotagem
-            dataframe (pd.DataFrame): Dados do ranking
-            titulo (str): Título do gráfico
-        """
-        barras = eixo.barh(range(len(dataframe)), dataframe['score_wsm'])
-        eixo.set_yticks(range(len(dataframe)))
-        eixo.set_yticklabels(dataframe['ticker'])
-        eixo.set_title(titulo, **self.estilo_titulos)
-        eixo.set_xlabel('Score WSM', **self.estilo_eixos)
-        eixo.grid(True, axis='x', alpha=0.3)
-        eixo.set_axisbelow(True)
-
-        # Adicionar valores nas barras
-        for indice, barra in enumerate(barras):
-            largura = barra.get_width()
-            eixo.text(
-                largura + 0.3,
-                barra.get_y() + barra.get_height() / 2,
-                f'{largura:.1f}',
-                ha='left',
-                va='center',
-                fontweight='bold',
-                fontsize=9
-            )
+        # Margens com peso zero ficam fora do produto (inf * 0 resultaria em NaN no score)
+        usados = pesos != 0
+        return self._matriz_margens[:, usados] @ pesos[usados]
 
-    def gerar_relatorio_completo(self, top_empresas=15):
+    def gerar_relatorio_completo(self, top_empresas=15, dpi=150):
         """
         Gera relatório completo com todas as visualizações e análises
 
         Args:
             top_empresas (int): Número de empresas nos rankings
+            dpi (int): Resolução dos PNGs salvos (use 300 para impressão)
         """
         print("📈 Gerando relatório completo de análises...")
 
-        # Gráficos de ranking por metodologia
-        self.gerar_graficos_ranking_metodologias(top_empresas)
+        aplicar_estilo_graficos()
+        tarefas = [
+            # Gráficos de ranking por metodologia
+            (_desenhar_ranking_metodologias, (20, 6), self._dados_ranking_metodologias(top_empresas),
+             'output/graficos/ranking_metodologias.png', 'Gráfico de rankings'),
+            # Gráfico consolidado
+            (_desenhar_consolidado, (12, 8), self._dados_consolidado(top_empresas // 2),
+             'output/graficos/ranking_consolidado.png', 'Gráfico consolidado'),
+            # Gráficos comparativos WSM
+            (_desenhar_comparacao_pesos_wsm, (18, 8), self._dados_comparacao_pesos_wsm(top_empresas),
+             'output/graficos/comparacao_pesos_wsm.png', 'Gráfico WSM comparativo')
+        ]
 
-        # Gráfico consolidado
-        self.gerar_grafico_consolidado(top_empresas // 2)
+        if tarefas[1][2] is None:
+            print("⚠️ Nenhum dado disponível para gerar gráfico consolidado")
+            del tarefas[1]
 
-        # Gráficos comparativos WSM
-        self.gerar_graficos_comparacao_pesos_wsm(top_empresas)
+        self._renderizar_tarefas(tarefas, dpi)
 
         # Tabelas no console
         self.exibir_tabelas_ranking_console(top_empresas)
 
         print("\n✅ Relatório completo gerado com sucesso!")
-        print("📁 Arquivos salvos em: output/graficos/")
\ No newline at end of file
+        print("📁 Arquivos salvos em: output/graficos/")
+
+    def _renderizar_tarefas(self, tarefas, dpi):
+        """
+        Renderiza os gráficos independentes do relatório, em processos separados quando possível
+
+        Args:
+            tarefas (list): Tuplas (função de desenho, tamanho, dados, caminho, descrição)
+            dpi (int): Resolução dos PNGs
+        """
+        executar_tarefas_em_processos(
+            tarefas,
+            _renderizar_em_arquivo,
+            lambda tarefa: (*tarefa[:3], self._estilos, tarefa[3], dpi),
+            lambda tarefa: _renderizar_em_arquivo(*tarefa[:3], self._estilos, tarefa[3], dpi),
+            lambda tarefa: print(f"📊 {tarefa[4]} salvo: {tarefa[3]}")
+        )
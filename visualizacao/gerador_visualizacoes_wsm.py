@@ -1,8 +1,46 @@
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import os
+import pickle
 import pandas as pd
+from collections import namedtuple
+from matplotlib.backends.backend_pdf import PdfPages
+from visualizacao.utilitarios_graficos import (
+    OPCOES_PNG, aplicar_estilo_graficos, executar_tarefas_em_processos, top_k_indices
+)
+
+
+# Dados do score compartilhados entre os gráficos de um mesmo relatório
+_ContextoScore = namedtuple(
+    '_ContextoScore',
+    ['coluna_score', 'rotulo', 'scores_validos', 'media', 'mediana', 'dataframe_top']
+)
+
+# Trecho das mensagens exibidas nos gráficos sem dados
+_MENSAGEM_INDISPONIVEL = "não disponíveis"
+
+
+def _inicializar_processo_salvamento():
+    """Usa o backend Agg nos processos de salvamento (figuras desserializadas não abrem janelas)"""
+    plt.switch_backend('agg')
+
+
+def _salvar_figura_serializada(figura_serializada, nome_arquivo, dpi):
+    """
+    Desserializa uma figura e a salva em PNG (executado nos processos de salvamento)
+
+    Args:
+        figura_serializada (bytes): Figura serializada com pickle
+        nome_arquivo (str): Caminho do arquivo PNG
+        dpi (int): Resolução do PNG
+
+    Returns:
+        str: Caminho do arquivo salvo
+    """
+    figura = pickle.loads(figura_serializada)
+    figura.savefig(nome_arquivo, dpi=dpi, bbox_inches='tight', facecolor='white', pil_kwargs=OPCOES_PNG)
+    plt.close(figura)
+    return nome_arquivo
 
 
 class GeradorVisualizacoesWSM:
@@ -11,44 +49,65 @@ class GeradorVisualizacoesWSM:
     Cria gráficos e relatórios visuais dos scores e indicadores
     """
 
+    # Configurações de estilo consistentes
+    estilo_titulos = {'fontsize': 12, 'fontweight': 'bold', 'pad': 10}
+    estilo_eixos = {'fontsize': 10}
+    estilo_legendas = {'fontsize': 9}
+
     def __init__(self, dataframe):
-        self.dataframe = dataframe.copy()
-        self._configurar_estilo_visualizacoes()
+        # Cópia rasa: os dados originais são só lidos; colunas substituídas aqui não afetam o dataframe recebido
+        self.dataframe = dataframe.copy(deep=False)
+        self._conjunto_colunas = frozenset(self.dataframe.columns)
+        self._cache_correlacoes = {}
+        self._cache_mascaras = {}
         self._mapear_colunas()
-
-    def _configurar_estilo_visualizacoes(self):
-        """Configura o estilo padrão para as visualizações"""
-        plt.style.use('default')
-        sns.set_palette("husl")
-
-        self.estilo_titulos = {'fontsize': 12, 'fontweight': 'bold', 'pad': 10}
-        self.estilo_eixos = {'fontsize': 10}
-        self.estilo_legendas = {'fontsize': 9}
+        self._categorizar_subsetor()
 
     def _mapear_colunas(self):
         """Mapeia os nomes das colunas para lidar com diferentes versões"""
+        colunas_disponiveis = self._conjunto_colunas
         self.colunas = {
-            'score': 'score_wsm' if 'score_wsm' in self.dataframe.columns else 'Score_WSM',
-            'score_penalidade': 'score_wsm_penalidade' if 'score_wsm_penalidade' in self.dataframe.columns else 'score_wsm_penalidade',
-            'empresa': 'Empresa' if 'Empresa' in self.dataframe.columns else 'Empresa',
-            'ticker': 'ticker' if 'ticker' in self.dataframe.columns else 'ticker',
-            'subsetor': 'Subsetor' if 'Subsetor' in self.dataframe.columns else 'Subsetor',
-            'margem_graham': 'margem_seguranca_graham' if 'margem_seguranca_graham' in self.dataframe.columns else 'graham_margem',
-            'margem_barsi': 'margem_seguranca_barsi' if 'margem_seguranca_barsi' in self.dataframe.columns else 'barsi_margem',
-            'preco_lucro': 'preco_lucro' if 'preco_lucro' in self.dataframe.columns else 'PL',
-            'roe': 'roe' if 'roe' in self.dataframe.columns else 'ROE',
-            'roic': 'roic' if 'roic' in self.dataframe.columns else 'ROIC'
+            'score': 'score_wsm' if 'score_wsm' in colunas_disponiveis else 'Score_WSM',
+            'score_penalidade': 'score_wsm_penalidade' if 'score_wsm_penalidade' in colunas_disponiveis else 'score_wsm_penalidade',
+            'empresa': 'Empresa' if 'Empresa' in colunas_disponiveis else 'Empresa',
+            'ticker': 'ticker' if 'ticker' in colunas_disponiveis else 'ticker',
+            'subsetor': 'Subsetor' if 'Subsetor' in colunas_disponiveis else 'Subsetor',
+            'margem_graham': 'margem_seguranca_graham' if 'margem_seguranca_graham' in colunas_disponiveis else 'graham_margem',
+            'margem_barsi': 'margem_seguranca_barsi' if 'margem_seguranca_barsi' in colunas_disponiveis else 'barsi_margem',
+            'preco_lucro': 'preco_lucro' if 'preco_lucro' in colunas_disponiveis else 'PL',
+            'roe': 'roe' if 'roe' in colunas_disponiveis else 'ROE',
+            'roic': 'roic' if 'roic' in colunas_disponiveis else 'ROIC'
         }
 
     def _obter_coluna(self, nome_coluna):
         """Obtém o nome real da coluna baseado no mapeamento"""
         return self.colunas.get(nome_coluna, nome_coluna)
 
-    def gerar_grafico_top_empresas(self, top_empresas=20, tamanho_figura=(12, 8), penalidade=False):
+    def _categorizar_subsetor(self):
         """
-        Gera gráfico de barras com as melhores empresas por score WSM
+        Converte a coluna de subsetor para categórica (contagens e filtros sobre códigos inteiros)
+
+        As categorias seguem a ordem de primeira ocorrência, preservando o desempate das contagens
+        """
+        coluna_subsetor = self._obter_coluna('subsetor')
+        if coluna_subsetor not in self._conjunto_colunas:
+            return
+
+        subsetores = self.dataframe[coluna_subsetor]
+        if not isinstance(subsetores.dtype, pd.CategoricalDtype):
+            self.dataframe[coluna_subsetor] = pd.Categorical(subsetores, categories=subsetores.dropna().unique())
+
+    def _preparar_contexto(self, penalidade=False, top_empresas=None):
+        """
+        Prepara os dados do score usados por mais de um gráfico (calculados uma única vez)
+
+        Args:
+            penalidade (bool): Usa o score com penalidade em vez do truncado
+            top_empresas (int): Tamanho do ranking de empresas (None para não calcular)
+
+        Returns:
+            _ContextoScore: Coluna, rótulo, scores válidos, média, mediana e top empresas
         """
-        figura, eixo = plt.subplots(figsize=tamanho_figura)
         if penalidade:
             coluna_score = self._obter_coluna('score_penalidade')
             lbl = "WSM (Penalidade)"
@@ -56,134 +115,94 @@ class GeradorVisualizacoesWSM:
             coluna_score = self._obter_coluna('score')
             lbl = "WSM (Truncado à 0)"
 
-        if coluna_score not in self.dataframe.columns:
+        if coluna_score not in self._conjunto_colunas:
+            return _ContextoScore(coluna_score, lbl, None, None, None, None)
+
+        # Uma única extração da coluna em NumPy; média e mediana percorrem o array contíguo
+        scores = self.dataframe[coluna_score].to_numpy(dtype=float)
+        scores_validos = scores[~np.isnan(scores)]
+        dataframe_top = None
+        if top_empresas is not None:
+            dataframe_top = self.dataframe.iloc[top_k_indices(scores, top_empresas)]
+
+        if scores_validos.size:
+            media, mediana = scores_validos.mean(), np.median(scores_validos)
+        else:
+            media = mediana = np.nan
+
+        return _ContextoScore(coluna_score, lbl, scores_validos, media, mediana, dataframe_top)
+
+    def gerar_grafico_top_empresas(self, top_empresas=20, tamanho_figura=(12, 8), penalidade=False, contexto=None):
+        """
+        Gera gráfico de barras com as melhores empresas por score WSM
+        """
+        aplicar_estilo_graficos()
+        figura, eixo = plt.subplots(figsize=tamanho_figura)
+        if contexto is None:
+            contexto = self._preparar_contexto(penalidade, top_empresas)
+        coluna_score, lbl = contexto.coluna_score, contexto.rotulo
+
+        if contexto.scores_validos is None:
             print(f"⚠️ Coluna de score '{coluna_score}' não encontrada")
             return figura
 
         # Ordenar e selecionar top empresas
-        dataframe_top = self.dataframe.nlargest(top_empresas, coluna_score)
+        dataframe_top = contexto.dataframe_top
 
         # Criar labels para o eixo Y
         coluna_ticker = self._obter_coluna('ticker')
         coluna_empresa = self._obter_coluna('empresa')
 
-        if coluna_empresa in dataframe_top.columns:
-            labels_empresas = [
-                f"{linha[coluna_ticker]} - {str(linha[coluna_empresa])[:20]}..."
-                for _, linha in dataframe_top.iterrows()
-            ]
-        else:
-            labels_empresas = [
-                f"{linha[coluna_ticker]}"
-                for _, linha in dataframe_top.iterrows()
-            ]
+        # Concatenação em arrays Unicode de largura fixa (o dtype 'U20' já trunca o nome da empresa)
+        labels_empresas = dataframe_top[coluna_ticker].to_numpy(dtype=str)
+        if coluna_empresa in self._conjunto_colunas:
+            empresas = dataframe_top[coluna_empresa].to_numpy(dtype='U20')
+            labels_empresas = np.char.add(np.char.add(labels_empresas, ' - '), np.char.add(empresas, '...'))
+        labels_empresas = labels_empresas.tolist()
+
+        # Posições e larguras das barras calculadas uma única vez
+        posicoes = np.arange(len(dataframe_top))
+        larguras = dataframe_top[coluna_score].to_numpy(dtype=float)
 
         # Criar gráfico de barras horizontais
         barras = eixo.barh(
-            range(len(dataframe_top)),
-            dataframe_top[coluna_score],
+            posicoes,
+            larguras,
             color='steelblue',
             alpha=0.7,
             height=0.8
         )
 
         # Configurar labels e títulos
-        eixo.set_yticks(range(len(dataframe_top)))
+        eixo.set_yticks(posicoes)
         eixo.set_yticklabels(labels_empresas)
         eixo.set_xlabel('Score WSM', **self.estilo_eixos)
         eixo.set_title(f'Top {top_empresas} Empresas - Score {lbl} Fundamentalista', **self.estilo_titulos)
         eixo.grid(axis='x', alpha=0.3)
 
-        # Adicionar valores nas barras
-        for indice, barra in enumerate(barras):
-            largura = barra.get_width()
-            eixo.text(
-                largura + 0.1,
-                barra.get_y() + barra.get_height() / 2,
-                f'{largura:.1f}',
-                ha='left',
-                va='center',
-                fontsize=9
-            )
+        # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+        eixo.bar_label(
+            barras,
+            labels=[f'{largura:.1f}' for largura in larguras.tolist()],
+            padding=3,
+            fontsize=9
+        )
 
         plt.tight_layout()
         return figura
 
-    # def gerar_grafico_top_empresas_com_penalidade(self, top_empresas=20, tamanho_figura=(12, 8)):
-    #     """
-    #     Gera gráfico de barras com as melhores empresas por score WSM
-    #     """
-    #     figura, eixo = plt.subplots(figsize=tamanho_figura)
-    #
-    #     coluna_score = self._obter_coluna('score_penalidade')
-    #
-    #     if coluna_score not in self.dataframe.columns:
-    #         print(f"⚠️ Coluna de score '{coluna_score}' não encontrada")
-    #         return figura
-    #
-    #     # Ordenar e selecionar top empresas
-    #     dataframe_top = self.dataframe.nlargest(top_empresas, coluna_score)
-    #
-    #     # Criar labels para o eixo Y
-    #     coluna_ticker = self._obter_coluna('ticker')
-    #     coluna_empresa = self._obter_coluna('empresa')
-    #
-    #     if coluna_empresa in dataframe_top.columns:
-    #         labels_empresas = [
-    #             f"{linha[coluna_ticker]} - {str(linha[coluna_empresa])[:20]}..."
-    #             for _, linha in dataframe_top.iterrows()
-    #         ]
-    #     else:
-    #         labels_empresas = [
-    #             f"{linha[coluna_ticker]}"
-    #             for _, linha in dataframe_top.iterrows()
-    #         ]
-    #
-    #     # Criar gráfico de barras horizontais
-    #     barras = eixo.barh(
-    #         range(len(dataframe_top)),
-    #         dataframe_top[coluna_score],
-    #         color='steelblue',
-    #         alpha=0.7,
-    #         height=0.8
-    #     )
-    #
-    #     # Configurar labels e títulos
-    #     eixo.set_yticks(range(len(dataframe_top)))
-    #     eixo.set_yticklabels(labels_empresas)
-    #     eixo.set_xlabel('Score WSM', **self.estilo_eixos)
-    #     eixo.set_title(f'Top {top_empresas} Empresas - Score Fundamentalista (Penalidade)', **self.estilo_titulos)
-    #     eixo.grid(axis='x', alpha=0.3)
-    #
-    #     # Adicionar valores nas barras
-    #     for indice, barra in enumerate(barras):
-    #         largura = barra.get_width()
-    #         eixo.text(
-    #             largura + 0.1,
-    #             barra.get_y() + barra.get_height() / 2,
-    #             f'{largura:.1f}',
-    #             ha='left',
-    #             va='center',
-    #             fontsize=9
-    #         )
-    #
-    #     plt.tight_layout()
-    #     return figura
-
-    def gerar_grafico_distribuicao_scores(self, tamanho_figura=(10, 6), penalidade=False):
+    def gerar_grafico_distribuicao_scores(self, tamanho_figura=(10, 6), penalidade=False, contexto=None):
         """
         Gera histograma da distribuição dos scores WSM
         """
+        aplicar_estilo_graficos()
         figura, eixo = plt.subplots(figsize=tamanho_figura)
 
-        if penalidade:
-            coluna_score = self._obter_coluna('score_penalidade')
-            lbl = "WSM (Penalidade)"
-        else:
-            coluna_score = self._obter_coluna('score')
-            lbl = "WSM (Truncado à 0)"
+        if contexto is None:
+            contexto = self._preparar_contexto(penalidade)
+        lbl = contexto.rotulo
 
-        if coluna_score not in self.dataframe.columns:
+        if contexto.scores_validos is None:
             eixo.text(0.5, 0.5, 'Dados de score\nnão disponíveis',
                       ha='center', va='center', transform=eixo.transAxes)
             eixo.set_title('Distribuição dos Scores', **self.estilo_titulos)
@@ -191,7 +210,7 @@ class GeradorVisualizacoesWSM:
 
         # Criar histograma
         frequencias, intervalos, patches = eixo.hist(
-            self.dataframe[coluna_score].dropna(),
+            contexto.scores_validos,
             bins=20,
             color='lightblue',
             edgecolor='black',
@@ -204,8 +223,8 @@ class GeradorVisualizacoesWSM:
         eixo.grid(alpha=0.3)
 
         # Adicionar linhas de referência
-        media = self.dataframe[coluna_score].mean()
-        mediana = self.dataframe[coluna_score].median()
+        media = contexto.media
+        mediana = contexto.mediana
 
         eixo.axvline(media, color='red', linestyle='--', linewidth=2,
                      label=f'Média: {media:.2f}')
@@ -216,33 +235,40 @@ class GeradorVisualizacoesWSM:
         plt.tight_layout()
         return figura
 
-    def gerar_grafico_score_vs_margens_seguranca(self, tamanho_figura=(12, 5), penalidade=False):
+    def gerar_grafico_score_vs_margens_seguranca(self, tamanho_figura=(12, 5), penalidade=False, contexto=None):
         """
         Gera scatter plots comparando score com margens de segurança
         """
+        aplicar_estilo_graficos()
         figura, (eixo1, eixo2) = plt.subplots(1, 2, figsize=tamanho_figura)
 
-        if penalidade:
-            coluna_score = self._obter_coluna('score_penalidade')
-            lbl = "WSM (Penalidade)"
-        else:
-            coluna_score = self._obter_coluna('score')
-            lbl = "WSM (Truncado à 0)"
+        if contexto is None:
+            contexto = self._preparar_contexto(penalidade)
+        coluna_score, lbl = contexto.coluna_score, contexto.rotulo
 
-        # coluna_score = self._obter_coluna('score')
         coluna_margem_graham = self._obter_coluna('margem_graham')
         coluna_margem_barsi = self._obter_coluna('margem_barsi')
 
+        # Score extraído uma única vez para os dois gráficos
+        scores = None
+        if coluna_score in self._conjunto_colunas:
+            scores = self.dataframe[coluna_score].to_numpy(dtype=float)
+            scores_finitos = np.isfinite(scores)
+
         # Score vs Margem Graham
-        if coluna_score in self.dataframe.columns and coluna_margem_graham in self.dataframe.columns:
+        if scores is not None and coluna_margem_graham in self._conjunto_colunas:
+            # Apenas pares finitos; pontos rasterizados mantêm leves as saídas vetoriais
+            margens = self.dataframe[coluna_margem_graham].to_numpy(dtype=float)
+            validos = scores_finitos & np.isfinite(margens)
             dispersao1 = eixo1.scatter(
-                self.dataframe[coluna_score],
-                self.dataframe[coluna_margem_graham],
+                scores[validos],
+                margens[validos],
                 alpha=0.6,
                 c='blue',
                 s=50,
                 edgecolors='white',
-                linewidth=0.5
+                linewidth=0.5,
+                rasterized=True
             )
             eixo1.set_xlabel(f'Score {lbl}', **self.estilo_eixos)
             eixo1.set_ylabel('Margem Segurança Graham (%)', **self.estilo_eixos)
@@ -254,15 +280,19 @@ class GeradorVisualizacoesWSM:
             eixo1.set_title(f'Score {lbl} vs Margem Graham', **self.estilo_titulos)
 
         # Score vs Margem Barsi
-        if coluna_score in self.dataframe.columns and coluna_margem_barsi in self.dataframe.columns:
+        if scores is not None and coluna_margem_barsi in self._conjunto_colunas:
+            # Apenas pares finitos; pontos rasterizados mantêm leves as saídas vetoriais
+            margens = self.dataframe[coluna_margem_barsi].to_numpy(dtype=float)
+            validos = scores_finitos & np.isfinite(margens)
             dispersao2 = eixo2.scatter(
-                self.dataframe[coluna_score],
-                self.dataframe[coluna_margem_barsi],
+                scores[validos],
+                margens[validos],
                 alpha=0.6,
                 c='green',
                 s=50,
                 edgecolors='white',
-                linewidth=0.5
+                linewidth=0.5,
+                rasterized=True
             )
             eixo2.set_xlabel(f'Score {lbl}', **self.estilo_eixos)
             eixo2.set_ylabel('Margem Segurança Barsi (%)', **self.estilo_eixos)
@@ -289,21 +319,35 @@ class GeradorVisualizacoesWSM:
             'P_VP', 'Div_Yield', 'Marg_Liquida'
         ]
 
-        # Filtrar colunas existentes no dataframe
-        colunas_existentes = [col for col in colunas_correlacao if col in self.dataframe.columns]
+        # Filtrar colunas existentes no dataframe e, entre elas, as numéricas (as únicas que entram
+        # na correlação; colunas ainda em texto reduziriam o heatmap sem aviso)
+        colunas_existentes = [col for col in colunas_correlacao if col in self._conjunto_colunas]
+        dados_correlacao = self.dataframe[colunas_existentes].select_dtypes('number')
 
-        if len(colunas_existentes) < 3:
+        if len(dados_correlacao.columns) < 3:
             print("⚠️ Colunas insuficientes para gerar heatmap de correlação")
             return None
 
-        dataframe_correlacao = self.dataframe[colunas_existentes].corr()
+        # Matriz de correlação e máscara reaproveitadas entre chamadas (mesmas colunas, mesmo K)
+        chave_colunas = tuple(dados_correlacao.columns)
+        dataframe_correlacao = self._cache_correlacoes.get(chave_colunas)
+        if dataframe_correlacao is None:
+            dataframe_correlacao = dados_correlacao.corr()
+            self._cache_correlacoes[chave_colunas] = dataframe_correlacao
 
+        aplicar_estilo_graficos()
         figura, eixo = plt.subplots(figsize=tamanho_figura)
 
         # Criar máscara para triângulo superior
-        mascara = np.triu(np.ones_like(dataframe_correlacao, dtype=bool))
+        quantidade_indicadores = len(dataframe_correlacao)
+        mascara = self._cache_mascaras.get(quantidade_indicadores)
+        if mascara is None:
+            mascara = np.triu(np.ones((quantidade_indicadores, quantidade_indicadores), dtype=bool))
+            self._cache_mascaras[quantidade_indicadores] = mascara
 
         # Gerar heatmap
+        import seaborn as sns
+
         mapa_calor = sns.heatmap(
             dataframe_correlacao,
             mask=mascara,
@@ -313,52 +357,52 @@ class GeradorVisualizacoesWSM:
             ax=eixo,
             fmt='.2f',
             square=True,
-            cbar_kws={'shrink': 0.8}
+            cbar_kws={'shrink': 0.8},
+            rasterized=True
         )
 
         eixo.set_title('Correlação entre Indicadores Fundamentalistas', **self.estilo_titulos)
         plt.tight_layout()
         return figura
 
-    def gerar_grafico_score_por_subsetor(self, top_subsetores=15, tamanho_figura=(14, 8), penalidade=False):
+    def gerar_grafico_score_por_subsetor(self, top_subsetores=15, tamanho_figura=(14, 8), penalidade=False,
+                                         contexto=None):
         """
         Gera boxplot da distribuição de scores por subsetor com visual melhorado
         """
+        aplicar_estilo_graficos()
         figura, eixo = plt.subplots(figsize=tamanho_figura)
 
-        if penalidade:
-            coluna_score = self._obter_coluna('score_penalidade')
-            lbl = "WSM (Penalidade)"
-        else:
-            coluna_score = self._obter_coluna('score')
-            lbl = "WSM (Truncado à 0)"
+        if contexto is None:
+            contexto = self._preparar_contexto(penalidade)
+        coluna_score, lbl = contexto.coluna_score, contexto.rotulo
 
-        # coluna_score = self._obter_coluna('score')
         coluna_subsetor = self._obter_coluna('subsetor')
 
-        if coluna_score not in self.dataframe.columns or coluna_subsetor not in self.dataframe.columns:
+        if coluna_score not in self._conjunto_colunas or coluna_subsetor not in self._conjunto_colunas:
             eixo.text(0.5, 0.5, 'Dados insuficientes\npara análise por subsetor',
                       ha='center', va='center', transform=eixo.transAxes, fontsize=12)
             eixo.set_title(f'Distribuição do Score {lbl} por Subsetor', **self.estilo_titulos)
             return figura
 
-        # Selecionar subsetores com mais empresas
-        contagem_subsetores = self.dataframe[coluna_subsetor].value_counts()
-        subsetores_principais = contagem_subsetores.head(top_subsetores).index
-
-        dataframe_filtrado = self.dataframe[self.dataframe[coluna_subsetor].isin(subsetores_principais)]
+        # Selecionar subsetores com mais empresas (seleção parcial, sem ordenar todas as contagens)
+        contagem_subsetores = self.dataframe[coluna_subsetor].value_counts(sort=False)
+        subsetores_principais = contagem_subsetores.nlargest(top_subsetores).index
 
-        # Preparar dados para o boxplot
-        dados_plot = []
-        nomes_subsetores = []
+        # Uma única passada: scores válidos dos subsetores principais em formato longo
+        dados_validos = self.dataframe[[coluna_subsetor, coluna_score]].dropna(subset=[coluna_score])
+        dados_validos = dados_validos[dados_validos[coluna_subsetor].isin(subsetores_principais)]
+        contagem_validos = dados_validos.groupby(coluna_subsetor, observed=True).size()
 
-        for subsetor in subsetores_principais:
-            dados_subsetor = dataframe_filtrado[dataframe_filtrado[coluna_subsetor] == subsetor][coluna_score].dropna()
-            if len(dados_subsetor) > 0:
-                dados_plot.append(dados_subsetor)
-                nomes_subsetores.append(f"{subsetor}\n(n={len(dados_subsetor)})")
+        # Nome formatado de cada subsetor com dados, na ordem dos subsetores principais
+        nomes_formatados = {
+            subsetor: f"{subsetor}\n(n={contagem_validos[subsetor]})"
+            for subsetor in subsetores_principais
+            if contagem_validos.get(subsetor, 0) > 0
+        }
+        nomes_subsetores = list(nomes_formatados.values())
 
-        if not dados_plot:
+        if not nomes_subsetores:
             eixo.text(0.5, 0.5, 'Dados insuficientes\npara gerar boxplot',
                       ha='center', va='center', transform=eixo.transAxes, fontsize=12)
             eixo.set_title(f'Distribuição do Score {lbl} por Subsetor', **self.estilo_titulos)
@@ -366,20 +410,21 @@ class GeradorVisualizacoesWSM:
 
         # Criar boxplot com seaborn (mais bonito)
         # Preparar DataFrame para seaborn
-        dados_seaborn = []
-        for subsetor, nome_formatado in zip(subsetores_principais, nomes_subsetores):
-            dados_subsetor = dataframe_filtrado[dataframe_filtrado[coluna_subsetor] == subsetor][coluna_score].dropna()
-            for valor in dados_subsetor:
-                dados_seaborn.append({'Subsetor': nome_formatado, 'Score': valor})
+        df_seaborn = pd.DataFrame({
+            'Subsetor': dados_validos[coluna_subsetor].cat.rename_categories(
+                lambda subsetor: nomes_formatados.get(subsetor, subsetor)
+            ),
+            'Score': dados_validos[coluna_score]
+        })
 
-        df_seaborn = pd.DataFrame(dados_seaborn)
+        import seaborn as sns
 
         # Criar palette de cores
         cores = sns.color_palette("husl", len(nomes_subsetores))
 
         # Plotar com seaborn
         sns.boxplot(data=df_seaborn, x='Subsetor', y='Score', ax=eixo, palette=cores,
-                    width=0.7, fliersize=3, linewidth=1.5)
+                    order=nomes_subsetores, width=0.7, fliersize=3, linewidth=1.5)
 
         # Personalizar aparência
         eixo.set_title(f'Distribuição do Score {lbl} por Subsetor', **self.estilo_titulos)
@@ -395,7 +440,7 @@ class GeradorVisualizacoesWSM:
         eixo.tick_params(axis='y', labelsize=9)
 
         # Adicionar linha de média geral
-        media_geral = self.dataframe[coluna_score].mean()
+        media_geral = contexto.media
         eixo.axhline(y=media_geral, color='red', linestyle='--', alpha=0.8, linewidth=1.5,
                      label=f'Média Geral: {media_geral:.2f}')
 
@@ -412,6 +457,7 @@ class GeradorVisualizacoesWSM:
         """
         Gera gráfico de ranking específico para scores com penalidades
         """
+        aplicar_estilo_graficos()
         figura, eixo = plt.subplots(figsize=tamanho_figura)
 
         # Verificar se a coluna de penalidade existe
@@ -422,102 +468,107 @@ class GeradorVisualizacoesWSM:
             return figura
 
         # Ordenar por penalidade (do maior para o menor)
-        ranking_penalidade = resultados_completos.nlargest(top_empresas, 'score_wsm_penalidade')
+        scores_penalidade = resultados_completos['score_wsm_penalidade'].to_numpy(dtype=float)
+        ranking_penalidade = resultados_completos.iloc[top_k_indices(scores_penalidade, top_empresas)]
 
         # Criar labels
-        labels_empresas = []
-        for _, linha in ranking_penalidade.iterrows():
-            ticker = linha.get('ticker', 'N/A')
-            empresa = linha.get('Empresa', '')
-            if empresa:
-                labels_empresas.append(f"{ticker}\n{empresa[:15]}...")
-            else:
-                labels_empresas.append(ticker)
+        # Colunas ausentes assumem os mesmos valores padrão de antes ('N/A' e '')
+        colunas_labels = pd.DataFrame({
+            coluna: ranking_penalidade[coluna] if coluna in ranking_penalidade.columns else padrao
+            for coluna, padrao in (('ticker', 'N/A'), ('Empresa', ''))
+        }, index=ranking_penalidade.index)
+
+        # Concatenação em arrays Unicode de largura fixa (o dtype 'U15' já trunca o nome da empresa)
+        tickers = colunas_labels['ticker'].to_numpy(dtype=str)
+        empresas = colunas_labels['Empresa'].fillna('').to_numpy(dtype='U15')
+        labels_empresas = np.where(
+            empresas == '', tickers, np.char.add(np.char.add(tickers, '\n'), np.char.add(empresas, '...'))
+        ).tolist()
+
+        # Posições e larguras das barras calculadas uma única vez
+        posicoes = np.arange(len(ranking_penalidade))
+        larguras = ranking_penalidade['score_wsm_penalidade'].to_numpy(dtype=float)
 
         # Criar gráfico de barras horizontais
         barras = eixo.barh(
-            range(len(ranking_penalidade)),
-            ranking_penalidade['score_wsm_penalidade'],
+            posicoes,
+            larguras,
             color='#A23B72',  # Roxo para diferenciar
             alpha=0.8,
             height=0.7
         )
 
         # Configurações do gráfico
-        eixo.set_yticks(range(len(ranking_penalidade)))
+        eixo.set_yticks(posicoes)
         eixo.set_yticklabels(labels_empresas, fontsize=9)
         eixo.set_xlabel('Score WSM com Penalidades', **self.estilo_eixos)
         eixo.set_title(f'Top {top_empresas} Empresas - Score com Penalidades Aplicadas', **self.estilo_titulos)
         eixo.grid(axis='x', alpha=0.3)
         eixo.set_facecolor('#f8f9fa')
 
-        # Adicionar valores nas barras
-        for indice, barra in enumerate(barras):
-            largura = barra.get_width()
-            eixo.text(
-                largura + 0.1,
-                barra.get_y() + barra.get_height() / 2,
-                f'{largura:.1f}',
-                ha='left',
-                va='center',
-                fontsize=8,
-                fontweight='bold'
-            )
+        # Adicionar valores nas barras (uma única chamada para todos os rótulos)
+        eixo.bar_label(
+            barras,
+            labels=[f'{largura:.1f}' for largura in larguras.tolist()],
+            padding=3,
+            fontsize=8,
+            fontweight='bold'
+        )
 
         plt.tight_layout()
         return figura
 
-    def gerar_relatorio_completo(self, top_empresas=20, caminho_salvamento=None, penalidade=False):
+    def gerar_relatorio_completo(self, top_empresas=20, caminho_salvamento=None, penalidade=False, salvar_pdf=False,
+                                 liberar_figuras=False, dpi=150):
         """
         Gera relatório completo com todas as visualizações
+
+        Args:
+            top_empresas (int): Quantidade de empresas no ranking
+            caminho_salvamento (str): Prefixo dos arquivos salvos (None para não salvar)
+            penalidade (bool): Usa o score com penalidade em vez do truncado
+            salvar_pdf (bool): Salva um único PDF com uma página por gráfico em vez dos PNGs
+            liberar_figuras (bool): Fecha as figuras após salvá-las (requer caminho_salvamento)
+            dpi (int): Resolução dos PNGs salvos (use 300 para impressão)
+
+        Returns:
+            list: Figuras geradas, ou caminhos dos arquivos salvos quando liberar_figuras=True
+                e o salvamento foi concluído
         """
         print("📊 Gerando relatório visual completo WSM...")
 
         figuras_geradas = []
+        arquivos_salvos = []
 
         try:
-            # # 1. Gráfico COMPARATIVO dos dois scores (NOVO)
-            # print("   🔄 Gerando comparação de scores...")
-            # figura_comparativa = self.gerar_grafico_comparativo_scores(top_empresas)
-            # if self._verificar_figura_valida(figura_comparativa):
-            #     figuras_geradas.append(figura_comparativa)
-            # else:
-            #     print("   ⚠️ Gráfico comparativo não gerado - dados insuficientes")
-
-            # 2. Gráfico das top empresas (score normal)
+            # Dados do score compartilhados pelos gráficos abaixo
+            contexto = self._preparar_contexto(penalidade, top_empresas)
+
+            # 1. Gráfico das top empresas (score normal)
             print("   🏆 Gerando ranking das melhores empresas...")
-            figura_top = self.gerar_grafico_top_empresas(top_empresas, penalidade=penalidade)
+            figura_top = self.gerar_grafico_top_empresas(top_empresas, penalidade=penalidade, contexto=contexto)
             if self._verificar_figura_valida(figura_top):
                 figuras_geradas.append(figura_top)
             else:
                 print("   ⚠️ Gráfico de top empresas não gerado - dados insuficientes")
 
-            # erro de proposito para não perder a lógica:
-            # tenho que passar um bool para cada método para escolher entre score e score_penalidade. quero gerar 2 gráficos para cada
-            # print("   🏆 Gerando ranking das melhores empresas com penalidade...")
-            # figura_top_penalidade = self.gerar_grafico_top_empresas_com_penalidade(top_empresas)
-            # if self._verificar_figura_valida(figura_top_penalidade):
-            #     figuras_geradas.append(figura_top_penalidade)
-            # else:
-            #     print("   ⚠️ Gráfico de top empresas não gerado - dados insuficientes")
-
-            # 3. Distribuição de scores
+            # 2. Distribuição de scores
             print("   📈 Gerando distribuição de scores...")
-            figura_dist = self.gerar_grafico_distribuicao_scores(penalidade=penalidade)
+            figura_dist = self.gerar_grafico_distribuicao_scores(penalidade=penalidade, contexto=contexto)
             if self._verificar_figura_valida(figura_dist):
                 figuras_geradas.append(figura_dist)
             else:
                 print("   ⚠️ Gráfico de distribuição não gerado - dados insuficientes")
 
-            # 4. Comparação com margens de segurança
+            # 3. Comparação com margens de segurança
             print("   🔍 Gerando análise de margens de segurança...")
-            figura_margens = self.gerar_grafico_score_vs_margens_seguranca(penalidade=penalidade)
+            figura_margens = self.gerar_grafico_score_vs_margens_seguranca(penalidade=penalidade, contexto=contexto)
             if self._verificar_figura_valida(figura_margens):
                 figuras_geradas.append(figura_margens)
             else:
                 print("   ⚠️ Gráfico de margens não gerado - dados insuficientes")
 
-            # 5. Heatmap de correlação
+            # 4. Heatmap de correlação
             print("   🎯 Gerando mapa de correlações...")
             heatmap = self.gerar_heatmap_correlacao()
             if heatmap is not None and self._verificar_figura_valida(heatmap):
@@ -525,9 +576,9 @@ class GeradorVisualizacoesWSM:
             else:
                 print("   ⚠️ Heatmap não gerado - dados insuficientes")
 
-            # 6. Análise por subsetor
+            # 5. Análise por subsetor
             print("   🏢 Gerando análise por subsetor...")
-            figura_subsetor = self.gerar_grafico_score_por_subsetor(penalidade=penalidade)
+            figura_subsetor = self.gerar_grafico_score_por_subsetor(penalidade=penalidade, contexto=contexto)
             if self._verificar_figura_valida(figura_subsetor):
                 figuras_geradas.append(figura_subsetor)
             else:
@@ -535,7 +586,7 @@ class GeradorVisualizacoesWSM:
 
             # Salvar gráficos se solicitado
             if caminho_salvamento and figuras_geradas:
-                self._salvar_figuras(figuras_geradas, caminho_salvamento)
+                arquivos_salvos = self._salvar_figuras(figuras_geradas, caminho_salvamento, salvar_pdf, dpi)
 
             print(f"✅ Relatório WSM gerado: {len(figuras_geradas)} visualizações criadas de 6 possíveis")
 
@@ -544,6 +595,13 @@ class GeradorVisualizacoesWSM:
             import traceback
             traceback.print_exc()
 
+        # Figuras já gravadas em disco não precisam continuar ocupando memória. Se o salvamento
+        # falhou (_salvar_figuras devolve lista vazia), as figuras continuam abertas e são devolvidas
+        if liberar_figuras and caminho_salvamento and arquivos_salvos:
+            for figura in figuras_geradas:
+                plt.close(figura)
+            return arquivos_salvos
+
         return figuras_geradas
 
     def _verificar_figura_valida(self, figura):
@@ -553,26 +611,46 @@ class GeradorVisualizacoesWSM:
         if figura is None:
             return False
 
-        # Verificar se há eixos com dados
-        for ax in figura.get_axes():
-            if len(ax.collections) > 0 or len(ax.patches) > 0 or len(ax.lines) > 0:
-                return True
-            # Verificar se há texto (indicando mensagem de "dados não disponíveis")
-            if len(ax.texts) > 0:
-                for text in ax.texts:
-                    if "não disponíveis" not in text.get_text():
-                        return True
-        return False
-
-    def _salvar_figuras(self, figuras, caminho_base):
+        eixos = figura.get_axes()
+
+        # Verificar se há eixos com dados (caso comum: barras, pontos ou linhas)
+        if any(eixo.patches or eixo.collections or eixo.lines for eixo in eixos):
+            return True
+
+        # Sem dados: válida apenas se algum texto não for a mensagem de "dados não disponíveis"
+        return any(
+            _MENSAGEM_INDISPONIVEL not in texto.get_text()
+            for eixo in eixos
+            for texto in eixo.texts
+        )
+
+    def _salvar_figuras(self, figuras, caminho_base, salvar_pdf=False, dpi=150):
         """
         Salva as figuras em arquivos
+
+        Args:
+            figuras (list): Figuras do relatório
+            caminho_base (str): Prefixo dos arquivos
+            salvar_pdf (bool): Grava um único '{caminho_base}.pdf' (uma página por figura) em vez dos PNGs
+            dpi (int): Resolução dos PNGs (e dos elementos rasterizados do PDF)
+
+        Returns:
+            list: Caminhos dos arquivos salvos (lista vazia se o salvamento falhar)
         """
         try:
             diretorio = os.path.dirname(caminho_base)
             if diretorio:
                 os.makedirs(diretorio, exist_ok=True)
 
+            if salvar_pdf:
+                # Um único arquivo aberto para todas as páginas
+                nome_arquivo = f"{caminho_base}.pdf"
+                with PdfPages(nome_arquivo) as documento:
+                    for figura in figuras:
+                        documento.savefig(figura, dpi=dpi, bbox_inches='tight', facecolor='white')
+                print(f"   💾 Salvo: {nome_arquivo} ({len(figuras)} páginas)")
+                return [nome_arquivo]
+
             nomes_arquivos = [
                 'ranking_top_empresas',
                 'distribuicao_scores',
@@ -581,17 +659,32 @@ class GeradorVisualizacoesWSM:
                 'score_por_subsetor'
             ]
 
-            for indice, figura in enumerate(figuras):
-                if indice < len(nomes_arquivos):
-                    nome_arquivo = f"{caminho_base}_{nomes_arquivos[indice]}.png"
-                    figura.savefig(nome_arquivo, dpi=300, bbox_inches='tight', facecolor='white')
-                    print(f"   💾 Salvo: {nome_arquivo}")
+            tarefas = [
+                (figura, f"{caminho_base}_{nomes_arquivos[indice]}.png")
+                for indice, figura in enumerate(figuras)
+                if indice < len(nomes_arquivos)
+            ]
+
+            # A codificação dos PNGs domina o custo do relatório: quando possível, cada figura
+            # é serializada e salva em um processo separado
+            executar_tarefas_em_processos(
+                tarefas,
+                _salvar_figura_serializada,
+                lambda tarefa: (pickle.dumps(tarefa[0]), tarefa[1], dpi),
+                lambda tarefa: tarefa[0].savefig(tarefa[1], dpi=dpi, bbox_inches='tight', facecolor='white',
+                                                 pil_kwargs=OPCOES_PNG),
+                lambda tarefa: print(f"   💾 Salvo: {tarefa[1]}"),
+                inicializador=_inicializar_processo_salvamento
+            )
+            return [nome_arquivo for _, nome_arquivo in tarefas]
 
         except Exception as erro:
             print(f"   ⚠️ Erro ao salvar figuras WSM: {erro}")
+            return []
 
 
-def gerar_relatorio_wsm_rapido(dataframe, top_empresas=20, caminho_salvamento=None, penalidade=False):
+def gerar_relatorio_wsm_rapido(dataframe, top_empresas=20, caminho_salvamento=None, penalidade=False,
+                               salvar_pdf=False, liberar_figuras=False, dpi=150):
     """
     Função rápida para gerar relatório completo WSM
     """
@@ -599,7 +692,8 @@ def gerar_relatorio_wsm_rapido(dataframe, top_empresas=20, caminho_salvamento=No
     return gerador.gerar_relatorio_completo(
         top_empresas=top_empresas,
         caminho_salvamento=caminho_salvamento,
-        penalidade=penalidade
+        penalidade=penalidade,
+        salvar_pdf=salvar_pdf,
+        liberar_figuras=liberar_figuras,
+        dpi=dpi
     )
-
-
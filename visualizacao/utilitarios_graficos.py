@@ -0,0 +1,131 @@
+import numpy as np
+import os
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Compressão zlib rápida nos PNGs (sem perdas): arquivos um pouco maiores, gravação mais rápida
+OPCOES_PNG = {'compress_level': 1}
+
+# Estilo global do matplotlib já aplicado neste processo (compartilhado por todos os geradores)
+_estilo_aplicado = False
+
+
+def top_k_indices(valores, quantidade):
+    """
+    Seleciona os índices dos maiores valores, ignorando NaN, em ordem decrescente
+
+    Args:
+        valores (np.ndarray): Valores numéricos (float64)
+        quantidade (int): Número de posições do ranking
+
+    Returns:
+        np.ndarray: Índices posicionais do top-k
+    """
+    mascara_nan = np.isnan(valores)
+
+    # Sem NaN (caso comum) dispensa a cópia dos valores válidos
+    if mascara_nan.any():
+        indices_validos = np.flatnonzero(~mascara_nan)
+        valores_validos = valores[indices_validos]
+    else:
+        indices_validos = None
+        valores_validos = valores
+
+    total_validos = len(valores_validos)
+    quantidade = min(quantidade, total_validos)
+
+    if quantidade <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Seleção parcial dos k maiores (sem negar o array inteiro) e ordenação apenas dos escolhidos
+    selecionados = np.argpartition(valores_validos, total_validos - quantidade)[total_validos - quantidade:]
+
+    # Empates no limite do corte ficam com as primeiras ocorrências, como no nlargest(keep='first')
+    limiar = valores_validos[selecionados].min()
+    maiores = np.flatnonzero(valores_validos > limiar)
+    if len(maiores) + np.count_nonzero(valores_validos == limiar) > quantidade:
+        empatados = np.flatnonzero(valores_validos == limiar)[:quantidade - len(maiores)]
+        selecionados = np.concatenate([maiores, empatados])
+
+    if indices_validos is not None:
+        selecionados = indices_validos[selecionados]
+
+    selecionados = np.sort(selecionados)
+    return selecionados[np.argsort(-valores[selecionados], kind='stable')]
+
+
+def aplicar_estilo_graficos():
+    """Aplica o estilo padrão do matplotlib e a paleta usada em todos os gráficos (uma vez por processo)"""
+    global _estilo_aplicado
+    if _estilo_aplicado:
+        return
+
+    # Uso só de console não chega aqui e não importa matplotlib/seaborn
+    import matplotlib
+    import seaborn as sns
+
+    matplotlib.style.use('default')
+    sns.set_palette("husl")
+    _estilo_aplicado = True
+
+
+def executar_tarefas_em_processos(tarefas, funcao_processo, argumentos_processo, executar_local, ao_concluir,
+                                  inicializador=None):
+    """
+    Executa tarefas independentes em processos separados quando possível e, no processo atual,
+    apenas as que não foram concluídas pelos processos
+
+    Args:
+        tarefas (list): Tarefas a executar (repassadas às funções abaixo)
+        funcao_processo (callable): Função de nível de módulo executada nos processos
+        argumentos_processo (callable): Monta a tupla de argumentos de funcao_processo para uma tarefa
+        executar_local (callable): Executa uma tarefa no processo atual
+        ao_concluir (callable): Chamada com cada tarefa concluída (ex.: mensagem de log)
+        inicializador (callable): Executado uma vez em cada processo (opcional)
+    """
+    import matplotlib
+
+    # Só compensa com mais de um núcleo e 'fork' (com 'spawn' cada processo reimporta
+    # matplotlib/seaborn e o custo supera o ganho). O 'fork' só é seguro no Linux e fora de
+    # backends interativos (GUI), por isso o paralelismo exige o backend Agg
+    paralelo = (
+        len(tarefas) > 1
+        and (os.cpu_count() or 1) > 1
+        and sys.platform.startswith('linux')
+        and matplotlib.get_backend().lower() == 'agg'
+        and 'fork' in multiprocessing.get_all_start_methods()
+    )
+
+    futuros = []
+    if paralelo:
+        try:
+            # Argumentos (ex.: figuras serializadas) montados antes de qualquer envio aos processos
+            argumentos = [argumentos_processo(tarefa) for tarefa in tarefas]
+
+            with ProcessPoolExecutor(max_workers=min(len(tarefas), os.cpu_count()),
+                                     mp_context=multiprocessing.get_context('fork'),
+                                     initializer=inicializador) as executor:
+                for argumentos_tarefa in argumentos:
+                    futuros.append(executor.submit(funcao_processo, *argumentos_tarefa))
+
+        except Exception as erro:
+            print(f"⚠️ Execução paralela indisponível ({erro}); executando sequencialmente")
+
+    # Ao sair do bloco o executor já aguardou os processos: toda tarefa enviada está concluída,
+    # com ou sem erro, mesmo que o envio das seguintes tenha falhado
+    concluidas = set()
+    for indice, futuro in enumerate(futuros):
+        erro = futuro.exception()
+        if erro is not None:
+            print(f"⚠️ Falha na execução paralela ({erro}); executando sequencialmente")
+            continue
+        concluidas.add(indice)
+        ao_concluir(tarefas[indice])
+
+    for indice, tarefa in enumerate(tarefas):
+        if indice in concluidas:
+            continue
+        executar_local(tarefa)
+        ao_concluir(tarefa)